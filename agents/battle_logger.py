@@ -4,12 +4,33 @@ Battle Logger Utility
 Provides centralized logging for battle events across all agent tools.
 This module maintains a global battle context that can be accessed by
 buyer and seller shared tools to log their actions.
+
+Events are queued and sent to the backend by a single background thread,
+which combines up to BATCH_MAX_EVENTS events (or whatever arrives within
+BATCH_MAX_DELAY_SECONDS) into one event. Callers never write to the backend.
 """
 
+import atexit
+import logging
+import queue
+import threading
+import time
 from typing import Optional
 from agentbeats.logging import BattleContext, record_battle_event as _record_battle_event
 
+BATCH_MAX_EVENTS = 8
+BATCH_MAX_DELAY_SECONDS = 0.05
+
+# Parameter names that are always masked in tool request logs
+_SENSITIVE_KEYS = frozenset({"token", "auth_token", "authorization"})
+
+logger = logging.getLogger("battle_logger")
+
 _battle_context: Optional[BattleContext] = None
+# Events carry the context they were logged under, so a context switch needs no flush
+_queue: "queue.Queue[tuple[BattleContext, str]]" = queue.Queue()
+_flusher: Optional[threading.Thread] = None
+_flusher_lock = threading.Lock()
 
 
 def set_battle_context(context: Optional[BattleContext]):
@@ -35,14 +56,70 @@ def get_battle_context() -> Optional[BattleContext]:
 
 def log_battle_event(message: str):
     """
-    Log a battle event if context is available.
+    Queue a battle event if context is available.
     Does nothing if battle context is not set.
     
     Args:
         message: The event message to log
     """
-    if _battle_context:
-        _record_battle_event(_battle_context, message)
+    context = _battle_context
+    if not context:
+        return
+
+    _ensure_flusher()
+    _queue.put((context, message))
+
+
+def flush_battle_events():
+    """Block until every queued event has been sent to the backend."""
+    if _flusher is not None:
+        _queue.join()
+
+
+def _ensure_flusher():
+    global _flusher
+    if _flusher is not None:
+        return
+    with _flusher_lock:
+        if _flusher is None:
+            _flusher = threading.Thread(target=_run_flusher, name="battle-logger", daemon=True)
+            _flusher.start()
+
+
+def _send(context: BattleContext, messages: list[str]):
+    try:
+        _record_battle_event(context, "\n".join(messages))
+    except Exception as e:
+        logger.warning("Failed to record battle events: %s", e)
+
+
+def _run_flusher():
+    """Drain the queue forever, sending events in batches."""
+    while True:
+        context, message = _queue.get()
+        batch = [message]
+        taken = 1
+        deadline = time.monotonic() + BATCH_MAX_DELAY_SECONDS
+        while taken < BATCH_MAX_EVENTS:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                next_context, next_message = _queue.get(timeout=remaining)
+            except queue.Empty:
+                break
+            taken += 1
+            if next_context is not context:
+                _send(context, batch)
+                context, batch = next_context, []
+            batch.append(next_message)
+
+        _send(context, batch)
+        for _ in range(taken):
+            _queue.task_done()
+
+
+atexit.register(flush_battle_events)
 
 
 def log_tool_request(tool_name: str, **kwargs):
@@ -51,20 +128,19 @@ def log_tool_request(tool_name: str, **kwargs):
     
     Args:
         tool_name: Name of the tool being called
-        **kwargs: Tool parameters (sensitive data like tokens will be masked)
+        **kwargs: Tool parameters. Callers should not pass auth tokens; keys in
+            _SENSITIVE_KEYS are still masked as a safety net.
     """
-    if not _battle_context:
+    if _battle_context is None:
         return
     
-    # Mask sensitive data
-    safe_kwargs = {}
-    for key, value in kwargs.items():
-        if 'token' in key.lower() or 'auth' in key.lower():
-            safe_kwargs[key] = "***"
-        else:
-            safe_kwargs[key] = value
+    if not kwargs:
+        log_battle_event(f"🔧 {tool_name}()")
+        return
     
-    params_str = ", ".join(f"{k}={v}" for k, v in safe_kwargs.items())
+    params_str = ", ".join(
+        f"{k}={'***' if k in _SENSITIVE_KEYS else v}" for k, v in kwargs.items()
+    )
     log_battle_event(f"🔧 {tool_name}({params_str})")
 
 
@@ -77,7 +153,7 @@ def log_tool_response(tool_name: str, success: bool, summary: str):
         success: Whether the operation succeeded
         summary: Brief summary of the result
     """
-    if not _battle_context:
+    if _battle_context is None:
         return
     
     status = "✅" if success else "❌"
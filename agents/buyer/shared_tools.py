@@ -4,16 +4,21 @@ AgentBeats Tools for Buyer Agents
 These tools allow buyer agents to interact with the marketplace API.
 """
 
-import os
+import asyncio
+import atexit
+import logging
+import logging.handlers
+import queue
 import sys
+import time
+from dataclasses import dataclass
 from pathlib import Path
 
-# Add agents directory to sys.path to enable shared battle_logger import
+# Add agents directory to sys.path to enable shared battle_logger / marketplace_client imports
 agents_dir = Path(__file__).parent.parent
 if str(agents_dir) not in sys.path:
     sys.path.insert(0, str(agents_dir))
 
-import requests
 import agentbeats as ab
 from typing import Optional
 
@@ -24,63 +29,160 @@ from agentbeats.logging import BattleContext
 log_tool_request = battle_logger.log_tool_request
 log_tool_response = battle_logger.log_tool_response
 
-# API configuration
-API_URL = os.getenv("MARKETPLACE_API_URL", "http://localhost:8000")
+# Shared marketplace API client - one connection pool per agent process
+import marketplace_client
+API_URL = marketplace_client.API_URL
+_CLIENT = marketplace_client.client
+get_auth_header = marketplace_client.get_auth_header
+json_loads = marketplace_client.json_loads
+
+# Logging - records are handed to a background thread so tool calls never block on stdout
+logger = logging.getLogger("buyer_agent")
+logger.setLevel(logging.INFO)
+
+# Only add a handler if none present (avoid duplicates on re-import)
+if not logger.handlers:
+    _log_queue: queue.Queue = queue.Queue()
+    _stream_handler = logging.StreamHandler(sys.stdout)
+    _stream_handler.setFormatter(logging.Formatter("%(message)s"))
+    logger.addHandler(logging.handlers.QueueHandler(_log_queue))
+    logger.propagate = False
+    _log_listener = logging.handlers.QueueListener(_log_queue, _stream_handler)
+    _log_listener.start()
+    # Write out records still queued when the interpreter exits
+    atexit.register(_log_listener.stop)
+
+# Upper bound on concurrent product fetches issued by a single compare_products call
+MAX_COMPARE_CONCURRENCY = 8
+
+# Short-lived caches for read-mostly lookups (product details and search results).
+# Neither endpoint depends on the caller's token, so entries are keyed by
+# product_id / query only. Both caches are cleared whenever the battle, round or
+# day in the battle metadata changes, since rankings and prices change daily.
+# Tools run on the event loop, so no lock is needed.
+CACHE_TTL_SECONDS = 30.0
+CACHE_MAX_ENTRIES = 512
+_product_cache: dict[str, tuple[float, dict]] = {}
+_search_cache: dict[str, tuple[float, list]] = {}
+
+
+def _cache_get(cache: dict, key: str):
+    """Return a cached value, or None if it is missing or expired."""
+    entry = cache.get(key)
+    if entry is None:
+        return None
+    expires_at, value = entry
+    if expires_at < time.monotonic():
+        del cache[key]
+        return None
+    return value
+
+
+def _cache_set(cache: dict, key: str, value) -> None:
+    """Store a value, evicting the oldest entry once the cache is full."""
+    if key not in cache and len(cache) >= CACHE_MAX_ENTRIES:
+        cache.pop(next(iter(cache)))
+    cache[key] = (time.monotonic() + CACHE_TTL_SECONDS, value)
+
+
+def clear_cache() -> None:
+    """Drop all cached product and search responses."""
+    _product_cache.clear()
+    _search_cache.clear()
 
 
 # Initialize battle context from database metadata
 # This allows buyer agents to retrieve battle context stored by the green agent
 _buyer_counter = 0
 _last_battle_id = None
+# (battle_id, round, day) the cached products and searches were fetched under
+_last_market_clock = None
 _fallback_agent_name = None
-_buyer_identity = {"id": None, "name": None, "token": None}
 
 
-def _update_buyer_identity(auth_token: Optional[str]):
+@dataclass(slots=True)
+class BuyerIdentity:
+    """Buyer profile cached for the auth token it was fetched with."""
+    id: Optional[str] = None
+    name: Optional[str] = None
+    token: Optional[str] = None
+
+
+_buyer_identity = BuyerIdentity()
+
+# How long an established battle context / buyer profile is trusted before re-polling
+CONTEXT_TTL_SECONDS = 5.0
+IDENTITY_TTL_SECONDS = 300.0
+_context_last_checked = 0.0
+_identity_fetched_at = 0.0
+
+
+async def _update_buyer_identity(auth_token: Optional[str]):
     """Fetch and cache the buyer identity using their auth token."""
-    global _buyer_identity
+    global _buyer_identity, _identity_fetched_at
 
     if not auth_token:
         return None
 
-    cached_token = _buyer_identity.get("token")
-    if cached_token == auth_token and _buyer_identity.get("name"):
+    cached_token = _buyer_identity.token
+    is_fresh = time.monotonic() - _identity_fetched_at < IDENTITY_TTL_SECONDS
+    if cached_token == auth_token and _buyer_identity.name and is_fresh:
         return _buyer_identity
 
     try:
-        response = requests.get(
-            f"{API_URL}/buyer/me",
-            headers=get_auth_header(auth_token)
+        response = await _CLIENT.get(
+            "/buyer/me",
+            headers=get_auth_header(auth_token),
         )
         if response.status_code == 200:
-            data = response.json()
-            _buyer_identity = {
-                "id": data.get("id"),
-                "name": data.get("name"),
-                "token": auth_token,
-            }
+            data = json_loads(response.content)
+            _buyer_identity = BuyerIdentity(
+                id=data.get("id"),
+                name=data.get("name"),
+                token=auth_token,
+            )
+            _identity_fetched_at = time.monotonic()
             return _buyer_identity
         else:
-            print(f"⚠️  Buyer agent: Failed to fetch profile - Status {response.status_code}")
+            logger.warning("⚠️  Buyer agent: Failed to fetch profile - Status %s", response.status_code)
     except Exception as e:
-        print(f"⚠️  Buyer agent: Exception fetching buyer profile: {e}")
+        logger.warning("⚠️  Buyer agent: Exception fetching buyer profile: %s", e)
     
     return None
 
 
-def _get_battle_context_from_db(auth_token: Optional[str] = None):
+async def _get_battle_context_from_db(auth_token: Optional[str] = None):
     """Retrieve battle context from database metadata and update if battle_id changed."""
-    global _buyer_counter, _last_battle_id, _fallback_agent_name
+    global _buyer_counter, _last_battle_id, _fallback_agent_name, _context_last_checked, _last_market_clock
     
-    buyer_identity = _update_buyer_identity(auth_token) if auth_token else None
-    if not buyer_identity and _buyer_identity.get("name"):
-        buyer_identity = _buyer_identity
+    # Skip polling while a recently confirmed context exists for the same buyer
+    now = time.monotonic()
+    if (
+        battle_logger.get_battle_context() is not None
+        and now - _context_last_checked < CONTEXT_TTL_SECONDS
+        and (not auth_token or auth_token == _buyer_identity.token)
+    ):
+        return True
     
     try:
-        # Retrieve battle metadata from the API
-        response = requests.get(f"{API_URL}/admin/metadata")
-        if response.status_code == 200:
-            metadata = response.json()
+        # The buyer profile only needs refreshing before a context exists or when the token changes
+        needs_identity = bool(auth_token) and (
+            battle_logger.get_battle_context() is None
+            or auth_token != _buyer_identity.token
+        )
+        if needs_identity:
+            # Retrieve battle metadata and the buyer profile concurrently
+            buyer_identity, (status_code, metadata) = await asyncio.gather(
+                _update_buyer_identity(auth_token),
+                marketplace_client.get_battle_metadata(),
+            )
+        else:
+            buyer_identity = None
+            status_code, metadata = await marketplace_client.get_battle_metadata()
+        if not buyer_identity and _buyer_identity.name:
+            buyer_identity = _buyer_identity
+
+        if status_code == 200:
             battle_id = metadata.get("battle_id")
             backend_url = metadata.get("backend_url")
             
@@ -91,6 +193,12 @@ def _get_battle_context_from_db(auth_token: Optional[str] = None):
                     _buyer_counter += 1
                     _last_battle_id = battle_id
                     _fallback_agent_name = None
+
+                # Rankings and prices change every day; products from a previous battle no longer exist
+                market_clock = (battle_id, metadata.get("round"), metadata.get("day"))
+                if market_clock != _last_market_clock:
+                    clear_cache()
+                    _last_market_clock = market_clock
                 
                 if _fallback_agent_name is None:
                     # Ensure we always have a fallback agent name
@@ -98,7 +206,7 @@ def _get_battle_context_from_db(auth_token: Optional[str] = None):
                         _buyer_counter = 1
                     _fallback_agent_name = f"buyer{_buyer_counter}"
                 
-                desired_name = buyer_identity.get("name") if buyer_identity else None
+                desired_name = buyer_identity.name if buyer_identity else None
                 if not desired_name:
                     desired_name = _fallback_agent_name
                 
@@ -117,29 +225,31 @@ def _get_battle_context_from_db(auth_token: Optional[str] = None):
                         agent_name=desired_name
                     )
                     battle_logger.set_battle_context(context)
-                    print(f"✅ Buyer agent '{desired_name}': Battle context initialized from database")
-                    print(f"   battle_id={battle_id}, backend_url={backend_url}")
+                    logger.info(
+                        "✅ Buyer agent '%s': Battle context initialized from database\n"
+                        "   battle_id=%s, backend_url=%s",
+                        desired_name, battle_id, backend_url,
+                    )
+                _context_last_checked = now
                 return True
             else:
-                print(f"⚠️  Buyer agent: Metadata retrieved but missing values - battle_id={battle_id}, backend_url={backend_url}")
+                logger.warning(
+                    "⚠️  Buyer agent: Metadata retrieved but missing values - battle_id=%s, backend_url=%s",
+                    battle_id, backend_url,
+                )
         else:
-            print(f"⚠️  Buyer agent: Failed to retrieve metadata - Status {response.status_code}")
+            logger.warning("⚠️  Buyer agent: Failed to retrieve metadata - Status %s", status_code)
     except Exception as e:
-        print(f"⚠️  Buyer agent: Exception retrieving battle context: {e}")
+        logger.warning("⚠️  Buyer agent: Exception retrieving battle context: %s", e)
     
     return False
 
-# Try to initialize on module load
-_get_battle_context_from_db()
-
-
-def get_auth_header(auth_token: str) -> dict:
-    """Helper to create authorization header"""
-    return {"Authorization": f"Bearer {auth_token}"}
+# Battle context is initialized lazily on the first tool call, since the
+# async client can only be awaited from within the agent's event loop
 
 
 @ab.tool
-def search_products(query: str = "", auth_token: Optional[str] = None):
+async def search_products(query: str = "", auth_token: Optional[str] = None):
     """
     Search for products in the marketplace.
     
@@ -151,16 +261,26 @@ def search_products(query: str = "", auth_token: Optional[str] = None):
         List of products matching the search criteria
     """
     # Lazy initialization - try to get battle context if not already initialized
-    _get_battle_context_from_db(auth_token)
+    await _get_battle_context_from_db(auth_token)
+    
+    log_tool_request("search_products", query=query)
     
-    log_tool_request("search_products", query=query, auth_token=auth_token)
+    cached_products = _cache_get(_search_cache, query)
+    if cached_products is not None:
+        log_tool_response("search_products", True, f"Found {len(cached_products)} products for query '{query}' (cached)")
+        return {
+            "success": True,
+            "count": len(cached_products),
+            "products": cached_products
+        }
     
-    headers = get_auth_header(auth_token) if auth_token else {}
-    response = requests.get(f"{API_URL}/search?q={query}", headers=headers)
+    headers = get_auth_header(auth_token) if auth_token else None
+    response = await _CLIENT.get("/search", params={"q": query}, headers=headers)
 
     
     if response.status_code == 200:
-        products = response.json()
+        products = json_loads(response.content)
+        _cache_set(_search_cache, query, products)
         log_tool_response("search_products", True, f"Found {len(products)} products for query '{query}'")
         return {
             "success": True,
@@ -176,29 +296,22 @@ def search_products(query: str = "", auth_token: Optional[str] = None):
         }
 
 
-@ab.tool
-def get_product_details(product_id: str, auth_token: Optional[str] = None):
-    """
-    Get detailed information about a specific product.
-    
-    Args:
-        product_id: ID of the product to retrieve
-        auth_token: Optional buyer authentication token
-    
-    Returns:
-        dict: Product details including name, description, price, seller info, image, etc.
-    
-    Example:
-        >>> get_product_details("some-uuid")
-    """
-    _get_battle_context_from_db(auth_token)
-    log_tool_request("get_product_details", product_id=product_id, auth_token=auth_token)
+async def _fetch_product_details(product_id: str, auth_token: Optional[str] = None) -> dict:
+    """Fetch a single product and log the outcome without refreshing battle context."""
+    cached_product = _cache_get(_product_cache, product_id)
+    if cached_product is not None:
+        log_tool_response("get_product_details", True, f"Retrieved {cached_product.get('name', product_id)} for product_id '{product_id}' (cached)")
+        return {
+            "success": True,
+            "product": cached_product
+        }
     
-    headers = get_auth_header(auth_token) if auth_token else {}
-    response = requests.get(f"{API_URL}/product/{product_id}", headers=headers)
+    headers = get_auth_header(auth_token) if auth_token else None
+    response = await _CLIENT.get(f"/product/{product_id}", headers=headers)
     
     if response.status_code == 200:
-        product = response.json()
+        product = json_loads(response.content)
+        _cache_set(_product_cache, product_id, product)
         log_tool_response("get_product_details", True, f"Retrieved {product.get('name', product_id)} for product_id '{product_id}'")
         return {
             "success": True,
@@ -214,7 +327,28 @@ def get_product_details(product_id: str, auth_token: Optional[str] = None):
 
 
 @ab.tool
-def purchase_product(
+async def get_product_details(product_id: str, auth_token: Optional[str] = None):
+    """
+    Get detailed information about a specific product.
+    
+    Args:
+        product_id: ID of the product to retrieve
+        auth_token: Optional buyer authentication token
+    
+    Returns:
+        dict: Product details including name, description, price, seller info, image, etc.
+    
+    Example:
+        >>> get_product_details("some-uuid")
+    """
+    await _get_battle_context_from_db(auth_token)
+    log_tool_request("get_product_details", product_id=product_id)
+    
+    return await _fetch_product_details(product_id, auth_token)
+
+
+@ab.tool
+async def purchase_product(
     auth_token: str,
     product_id: str,
     purchased_at: Optional[int] = None
@@ -236,24 +370,23 @@ def purchase_product(
         ...     product_id="some-uuid"
         ... )
     """
-    _get_battle_context_from_db(auth_token)
-    log_tool_request("purchase_product", product_id=product_id, purchased_at=purchased_at, auth_token=auth_token)
+    await _get_battle_context_from_db(auth_token)
+    log_tool_request("purchase_product", product_id=product_id, purchased_at=purchased_at)
     
     payload = {}
     if purchased_at is not None:
         payload["purchased_at"] = purchased_at
     else:
-        import time
         payload["purchased_at"] = int(time.time())
     
-    response = requests.post(
-        f"{API_URL}/buy/{product_id}",
-        json=payload,
-        headers=get_auth_header(auth_token)
+    response = await _CLIENT.post(
+        f"/buy/{product_id}",
+        content=marketplace_client.json_dumps(payload),
+        headers={**get_auth_header(auth_token), "Content-Type": "application/json"},
     )
     
     if response.status_code == 200:
-        data = response.json()
+        data = json_loads(response.content)
         price = data.get("price_of_purchase", 0) / 100
         log_tool_response("purchase_product", True, f"Purchased {product_id} for ${price:.2f}")
         return {
@@ -274,7 +407,7 @@ def purchase_product(
 
 
 @ab.tool
-def compare_products(product_ids: list[str], auth_token: Optional[str] = None):
+async def compare_products(product_ids: list[str], auth_token: Optional[str] = None):
     """
     Compare multiple products side by side.
     
@@ -288,14 +421,22 @@ def compare_products(product_ids: list[str], auth_token: Optional[str] = None):
     Example:
         >>> compare_products(["some-uuid", "some-uuid-2"])
     """
-    _get_battle_context_from_db(auth_token)
-    log_tool_request("compare_products", product_ids=product_ids, auth_token=auth_token)
+    await _get_battle_context_from_db(auth_token)
+    log_tool_request("compare_products", product_ids=product_ids)
     
     products = []
     errors = []
     
-    for product_id in product_ids:
-        result = get_product_details(product_id, auth_token)
+    # Per-call cap, so one buyer's comparison never waits on another's
+    compare_semaphore = asyncio.Semaphore(MAX_COMPARE_CONCURRENCY)
+
+    async def fetch(product_id: str) -> dict:
+        async with compare_semaphore:
+            return await _fetch_product_details(product_id, auth_token)
+
+    # Fetch products concurrently (bounded); gather preserves the order of product_ids
+    results = await asyncio.gather(*(fetch(product_id) for product_id in product_ids))
+    for product_id, result in zip(product_ids, results):
         if result["success"]:
             products.append(result["product"])
         else:
@@ -304,10 +445,18 @@ def compare_products(product_ids: list[str], auth_token: Optional[str] = None):
                 "error": result.get("error", "Unknown error")
             })
     
+    price_range = None
     if products:
-        min_price = min(p["price_in_cent"] for p in products) / 100
-        max_price = max(p["price_in_cent"] for p in products) / 100
-        log_tool_response("compare_products", True, f"Compared {len(products)} products (${min_price:.2f}-${max_price:.2f})")
+        # Single pass for both bounds, shared by the log line and the result
+        min_cents = max_cents = products[0]["price_in_cent"]
+        for product in products[1:]:
+            price = product["price_in_cent"]
+            if price < min_cents:
+                min_cents = price
+            elif price > max_cents:
+                max_cents = price
+        price_range = {"min": min_cents, "max": max_cents}
+        log_tool_response("compare_products", True, f"Compared {len(products)} products (${min_cents / 100:.2f}-${max_cents / 100:.2f})")
     else:
         log_tool_response("compare_products", False, "No products found")
     
@@ -317,10 +466,7 @@ def compare_products(product_ids: list[str], auth_token: Optional[str] = None):
         "errors": errors if errors else None,
         "comparison": {
             "count": len(products),
-            "price_range": {
-                "min": min(p["price_in_cent"] for p in products) if products else 0,
-                "max": max(p["price_in_cent"] for p in products) if products else 0,
-            } if products else None
+            "price_range": price_range
         }
     }
 
@@ -5,9 +5,10 @@ Simple utility to load customer population and persona distribution.
 """
 
 import random
+from functools import cached_property
+from itertools import accumulate
 from pathlib import Path
 from typing import Dict, List
-import toml
 
 
 class SimulationConfig:
@@ -20,12 +21,20 @@ class SimulationConfig:
         Args:
             config_path: Path to simulation_config.toml. If None, uses default location.
         """
+        # Imported here so modules that only import this one skip the TOML parser
+        import tomllib
+        
         if config_path is None:
             config_path = Path(__file__).parent / "simulation_config.toml"
         
-        self.config = toml.load(config_path)
+        with open(config_path, "rb") as f:
+            self.config = tomllib.load(f)
         self._validate_config()
         
+        # Sampling tables are built once so repeated sampling skips re-accumulating weights
+        self._personas = tuple(self.persona_distribution.keys())
+        self._cum_weights = tuple(accumulate(self.persona_distribution.values()))
+        
     def _validate_config(self):
         """Validate that persona distribution sums to 100%."""
         distribution = self.config["persona_distribution"]
@@ -37,23 +46,19 @@ class SimulationConfig:
                 f"Current distribution: {distribution}"
             )
     
-    @property
+    @cached_property
     def total_customers(self) -> int:
         """Get total number of customers in the simulation."""
         return self.config["customer_population"]["total_customers"]
     
-    @property
+    @cached_property
     def persona_distribution(self) -> Dict[str, float]:
         """Get persona distribution percentages."""
         return self.config["persona_distribution"]
     
-    def get_persona_counts(self) -> Dict[str, int]:
-        """
-        Calculate absolute customer counts for each persona based on distribution.
-        
-        Returns:
-            Dictionary mapping persona_id to customer count
-        """
+    @cached_property
+    def persona_counts(self) -> Dict[str, int]:
+        """Absolute customer counts per persona, computed once from the static config."""
         counts = {}
         remaining = self.total_customers
         
@@ -70,6 +75,16 @@ class SimulationConfig:
         
         return counts
     
+    def get_persona_counts(self) -> Dict[str, int]:
+        """
+        Calculate absolute customer counts for each persona based on distribution.
+        
+        Returns:
+            Dictionary mapping persona_id to customer count
+        """
+        # Return a copy so callers can't mutate the cached counts
+        return dict(self.persona_counts)
+    
     def sample_customers(self, n: int) -> List[str]:
         """
         Sample customer personas using weighted random sampling.
@@ -80,9 +95,7 @@ class SimulationConfig:
         Returns:
             List of persona IDs representing sampled customers
         """
-        personas = list(self.persona_distribution.keys())
-        weights = list(self.persona_distribution.values())
-        return random.choices(personas, weights=weights, k=n)
+        return random.choices(self._personas, cum_weights=self._cum_weights, k=n)
     
     def get_summary(self) -> Dict:
         """
@@ -6,21 +6,23 @@ This file provides example tools for a green (evaluation) agent.
 These tools are used to communicate with other agents and report battle results.
 """
 
-import json
-from nturl2path import url2pathname
-from os import name
+import atexit
+import logging
+import logging.handlers
 import agentbeats as ab
-from agentbeats.logging import BattleContext
-import requests
-from agentbeats.utils.agents import send_message_to_agent, send_messages_to_agents
-from agentbeats.logging import record_battle_event, record_battle_result
-import random
+from agentbeats.logging import BattleContext, record_battle_event, record_battle_result
+import httpx
+from agentbeats.utils.agents import send_message_to_agent
 import asyncio
-import toml
+import importlib.util
+import random
+import threading
+from functools import lru_cache
 from pathlib import Path
 import os
 from enum import Enum
-import subprocess
+from dataclasses import dataclass, field
+from typing import Collection, NamedTuple
 import sys
 
 # Add agents directory to sys.path to enable shared battle_logger import
@@ -33,15 +35,79 @@ if str(agents_dir) not in sys.path:
 import battle_logger
 set_battle_context = battle_logger.set_battle_context
 
+# orjson-backed JSON (falls back to the stdlib) and optional HTTP/2 support
+from marketplace_client import HTTP2_ENABLED, json_dumps, json_loads
+
+
+# Logging - records are buffered and written in batches; warnings flush immediately,
+# everything else at each phase transition (see change_phase/advance_marketplace)
+logger = logging.getLogger("green_agent")
+logger.setLevel(logging.INFO)
+if not logger.handlers:
+    _stream_handler = logging.StreamHandler(sys.stdout)
+    _stream_handler.setFormatter(logging.Formatter("%(message)s"))
+    logger.addHandler(
+        logging.handlers.MemoryHandler(
+            capacity=100, flushLevel=logging.WARNING, target=_stream_handler
+        )
+    )
+logger.propagate = False
+
+
+def flush_logs() -> None:
+    """Write out any buffered log records."""
+    for handler in logger.handlers:
+        handler.flush()
 
-# Global state to store battle context
+
+atexit.register(flush_logs)
+
+
+# Context of the most recently started battle; battle helpers use BattleState.battle_context
 battle_context = None
 
 api_url = "http://localhost:8000"
 admin_api_key = os.getenv("ADMIN_API_KEY")
 
-
-from typing import NamedTuple
+# Shared async client so backend calls don't block the event loop and
+# independent requests can run concurrently over pooled connections
+_http = httpx.AsyncClient(
+    base_url=api_url,
+    # Every backend call carries the admin key, so set it once as a client default
+    headers={"X-Admin-Key": admin_api_key} if admin_api_key else None,
+    timeout=httpx.Timeout(30.0, connect=5.0),
+    limits=httpx.Limits(max_connections=64, max_keepalive_connections=16),
+    # Same h2 detection as the buyer/seller client; only negotiated over TLS
+    http2=HTTP2_ENABLED,
+)
+_JSON_HEADERS = {"Content-Type": "application/json"}
+# Retry policy for transient backend failures (connection errors, 5xx on idempotent calls)
+REQUEST_ATTEMPTS = 4
+RETRY_INITIAL_DELAY_SECONDS = 0.05
+RETRY_MAX_DELAY_SECONDS = 1.0
+# Caps concurrent account-creation requests so large battles don't flood the admin API
+_account_creation_semaphore = asyncio.Semaphore(8)
+
+
+def _int_env(*names: str, default: int) -> int:
+    """Return the first of the given environment variables that parses as an int."""
+    for name in names:
+        value = os.getenv(name)
+        if value:
+            try:
+                return int(value)
+            except ValueError:
+                pass
+    return default
+
+
+# Battle length, read once at import
+ROUNDS = _int_env("MARKETPLACE_ROUNDS", "SIMULATION_ROUNDS", default=3)
+DAYS = _int_env("MARKETPLACE_DAYS", "SIMULATION_DAYS", default=5)
+
+# Caps how many participant agents are prompted at once (GREEN_AGENT_CONCURRENCY)
+AGENT_CONCURRENCY = max(1, _int_env("GREEN_AGENT_CONCURRENCY", default=16))
+_agent_semaphore = asyncio.Semaphore(AGENT_CONCURRENCY)
 
 
 class Seller(NamedTuple):
@@ -69,97 +135,275 @@ class Phase(str, Enum):
     OPEN = "open"
 
 
-sellers: list[Seller] = []
-buyers: list[Buyer] = []
+@dataclass
+class BattleState:
+    """Participants of a single battle (keyed by id), created fresh for every orchestration run."""
 
-# If you change something here, also change it in app/services/phase_manager.py
-class Phase(str, Enum):
-    """Lifecycle phases that gate marketplace operations."""
+    sellers: dict[str, Seller] = field(default_factory=dict)
+    buyers: dict[str, Buyer] = field(default_factory=dict)
+    battle_context: BattleContext | None = None
+    # Phase last sent to the backend in this battle; repeated identical updates are skipped
+    applied_phase: Phase | None = None
+    # Pending battle events and the task sending them (see _start_event_drainer)
+    event_queue: asyncio.Queue | None = None
+    event_drainer: asyncio.Task | None = None
 
-    #: Phase for seller management, where sellers can update listings
-    SELLER_MANAGEMENT = "seller_management"
-    #: Phase for buyer shopping, where buyers can purchase products
-    BUYER_SHOPPING = "buyer_shopping"
-    #: Phase for open marketplace, where all interactions are allowed
-    OPEN = "open"
 
+# Battle events are queued and sent by a background task per battle, so logging
+# never adds a backend round trip to the orchestration path
+EVENT_BATCH_MAX = 32
+EVENT_BATCH_DELAY_SECONDS = 0.1
 
-def change_phase(phase: Phase) -> None:
-    """
-    Update the marketplace backend to the specified phase.
+
+def _record_event(state: BattleState, message: str) -> None:
+    """Queue a battle event, or send it right away when no drainer is running."""
+    if state.battle_context is None:
+        return
+    if state.event_queue is None:
+        record_battle_event(state.battle_context, message)
+    else:
+        state.event_queue.put_nowait(message)
+
+
+async def _send_events(context: BattleContext, messages: list[str]) -> None:
+    try:
+        # record_battle_event is blocking, keep it off the event loop
+        await asyncio.to_thread(record_battle_event, context, "\n".join(messages))
+    except Exception as e:
+        logger.warning("⚠️  Failed to record battle events: %s", e)
+
+
+async def _drain_events(context: BattleContext, queue: asyncio.Queue) -> None:
+    """Coalesce queued events (up to EVENT_BATCH_MAX or EVENT_BATCH_DELAY_SECONDS) into one call."""
+    loop = asyncio.get_running_loop()
+    while True:
+        batch = [await queue.get()]
+        deadline = loop.time() + EVENT_BATCH_DELAY_SECONDS
+        while len(batch) < EVENT_BATCH_MAX:
+            remaining = deadline - loop.time()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(queue.get(), remaining))
+            except asyncio.TimeoutError:
+                break
+
+        await _send_events(context, batch)
+        for _ in batch:
+            queue.task_done()
+
+
+def _start_event_drainer(state: BattleState) -> None:
+    if state.event_drainer is None and state.battle_context is not None:
+        state.event_queue = asyncio.Queue()
+        state.event_drainer = asyncio.create_task(
+            _drain_events(state.battle_context, state.event_queue)
+        )
+
+
+async def _flush_events(state: BattleState) -> None:
+    """Wait until every queued event of the battle has been sent."""
+    if state.event_queue is not None:
+        await state.event_queue.join()
+
+
+async def _stop_event_drainer(state: BattleState) -> None:
+    if state.event_drainer is None:
+        return
+    await _flush_events(state)
+    state.event_drainer.cancel()
+    state.event_queue, state.event_drainer = None, None
+
+
+# Prompt templates sent to participant agents; {id} and {token} are filled per agent
+CREATE_LISTINGS_PROMPT = """
+Call /createProduct to create a product.
+
+Your seller ID: {id}
+Your auth token: {token}
+
+Use the auth token in the Authorization header as "Bearer {token}" when making API calls.
+
+Response format:
+{{
+    "product_id": "123", # id of the product you created
+}}
+        """
+
+BUY_PRODUCTS_PROMPT = """
+Call /search?q=keyword to find your product you want to buy. You can call /product/{{id}} to get more details about the product.
+
+Your buyer ID: {id}
+Your auth token: {token}
+
+Use the auth token in the Authorization header as "Bearer {token}" when making API calls.
+
+Response even if you decided not to buy a product.
+
+Response format:
+{{
+    "product_id": "123", # id of the product you bought, null if you decided not to buy a product
+    "decision": "buy" or "not buy"
+}}
+        """
+
+UPDATE_LISTINGS_PROMPT = """
+Call /updateProduct to update your product.
+
+Your seller ID: {id}
+Your auth token: {token}
+
+Use the auth token in the Authorization header as "Bearer {token}" when making API calls.
+
+Response format:
+{{
+    "product_id": "123", # id of the product you updated
+}}
+        """
+
+
+def _is_retryable(method: str, path: str, error: Exception) -> bool:
+    """Decide whether a failed backend call may be sent again."""
+    if isinstance(error, (httpx.ConnectError, httpx.ConnectTimeout)):
+        # The request never reached the backend
+        return True
+    # GETs and the /admin/* setters are idempotent; creates are not
+    idempotent = method == "GET" or path.startswith("/admin/")
+    if isinstance(error, httpx.HTTPStatusError):
+        return idempotent and error.response.status_code >= 500
+    return idempotent and isinstance(error, httpx.TransportError)
+
+
+async def _request_json(method: str, path: str, payload: dict | None = None) -> dict:
     """
+    Call the marketplace backend and return the decoded JSON body.
 
-    headers = {"X-Admin-Key": admin_api_key} if admin_api_key else None
-    response = requests.post(
-        f"{api_url}/admin/phase",
-        # json={"phase": phase.value},
-        # Currently, disabled because broken.
-        json={"phase": Phase.OPEN.value},
-        headers=headers,
-    )
-    if response.status_code != 200:
-        raise Exception(
-            f"Failed to update marketplace phase to {phase.value}: {response.text}"
+    Transient failures are retried up to REQUEST_ATTEMPTS times with
+    exponential backoff (see _is_retryable).
+
+    Raises:
+        httpx.HTTPStatusError: for any 4xx/5xx response, including the backend's error detail.
+    """
+    delay = RETRY_INITIAL_DELAY_SECONDS
+    for attempt in range(1, REQUEST_ATTEMPTS + 1):
+        try:
+            return await _send_request(method, path, payload)
+        except httpx.HTTPError as e:
+            if attempt == REQUEST_ATTEMPTS or not _is_retryable(method, path, e):
+                raise
+            wait = delay * random.uniform(0.5, 1.0)
+            logger.warning("⚠️  %s %s failed (%s), retrying in %.2fs", method, path, e, wait)
+        await asyncio.sleep(wait)
+        delay = min(delay * 2, RETRY_MAX_DELAY_SECONDS)
+
+
+async def _send_request(method: str, path: str, payload: dict | None) -> dict:
+    if payload is None:
+        response = await _http.request(method, path)
+    else:
+        # Encode with json_dumps so orjson is used when it is installed
+        response = await _http.request(
+            method, path, content=json_dumps(payload), headers=_JSON_HEADERS
+        )
+    if response.is_error:
+        raise httpx.HTTPStatusError(
+            f"{method} {path} failed with {response.status_code}: {response.text}",
+            request=response.request,
+            response=response,
         )
+    return json_loads(response.content) if response.content else {}
 
-    if battle_context:
-        record_battle_event(
-            battle_context, f"Marketplace phase set to '{phase.value}'"
+
+async def _post_json(path: str, payload: dict | None = None) -> dict:
+    return await _request_json("POST", path, payload)
+
+
+async def _get_json(path: str) -> dict:
+    return await _request_json("GET", path)
+
+
+async def change_phase(state: BattleState, phase: Phase) -> None:
+    """
+    Update the marketplace backend to the specified phase.
+    """
+    # The previous phase is over - show its progress before starting the next one
+    flush_logs()
+
+    # Currently, disabled because broken - the backend is always kept OPEN.
+    applied = Phase.OPEN
+    if applied is not state.applied_phase:
+        await _post_json("/admin/phase", {"phase": applied.value})
+        state.applied_phase = applied
+
+    if state.battle_context:
+        _record_event(
+            state, f"Marketplace phase set to '{phase.value}'"
         )
 
 
-def set_marketplace_day(day: int) -> None:
+async def set_marketplace_day(state: BattleState, day: int) -> None:
     """
     Update the marketplace backend to the specified simulated day.
     """
-    headers = {"X-Admin-Key": admin_api_key} if admin_api_key else None
-    response = requests.post(
-        f"{api_url}/admin/day",
-        json={"day": day},
-        headers=headers,
-    )
-    if response.status_code != 200:
-        raise Exception(
-            f"Failed to update marketplace day to {day}: {response.text}"
-        )
+    await _post_json("/admin/day", {"day": day})
 
-    if battle_context:
-        record_battle_event(
-            battle_context, f"Marketplace day set to '{day}'"
+    if state.battle_context:
+        _record_event(
+            state, f"Marketplace day set to '{day}'"
         )
 
 
-def set_marketplace_round(round_number: int) -> None:
+async def set_marketplace_round(state: BattleState, round_number: int) -> None:
     """
     Persist the active simulation round in the marketplace backend.
     """
-    headers = {"X-Admin-Key": admin_api_key} if admin_api_key else None
-    response = requests.post(
-        f"{api_url}/admin/round",
-        json={"round": round_number},
-        headers=headers,
-    )
-    if response.status_code != 200:
-        raise Exception(
-            f"Failed to update marketplace round to {round_number}: {response.text}"
-        )
+    await _post_json("/admin/round", {"round": round_number})
 
-    if battle_context:
-        record_battle_event(
-            battle_context, f"Marketplace round set to '{round_number}'"
+    if state.battle_context:
+        _record_event(
+            state, f"Marketplace round set to '{round_number}'"
         )
 
 
-def clear_database():
-    """Clear all data from the database tables by running a script in the correct environment"""
-    try:
-        print("🗑️  Clearing database...")
-        if battle_context:
-            record_battle_event(battle_context, "Clearing database...")
-        
-        # Create a simple Python script to clear the database
-        project_root = Path(__file__).parent.parent.parent
-        clear_script = """
+async def advance_marketplace(
+    state: BattleState,
+    *,
+    round_number: int | None = None,
+    day: int | None = None,
+    phase: Phase | None = None,
+) -> None:
+    """
+    Update round, day and phase in a single backend request.
+    """
+    # The previous phase is over - show its progress before starting the next one
+    flush_logs()
+
+    # Phase updates follow change_phase: always OPEN, and only sent when it changes
+    applied = Phase.OPEN if phase is not None else None
+    payload = {}
+    if round_number is not None:
+        payload["round"] = round_number
+    if day is not None:
+        payload["day"] = day
+    if applied is not None and applied is not state.applied_phase:
+        payload["phase"] = applied.value
+
+    await _post_json("/admin/advance", payload)
+    if "phase" in payload:
+        state.applied_phase = applied
+
+    if state.battle_context:
+        messages = []
+        if round_number is not None:
+            messages.append(f"Marketplace round set to '{round_number}'")
+        if day is not None:
+            messages.append(f"Marketplace day set to '{day}'")
+        if phase is not None:
+            messages.append(f"Marketplace phase set to '{phase.value}'")
+        _record_event(state, "\n".join(messages))
+
+
+_CLEAR_DATABASE_SCRIPT = """
 import sys
 sys.path.insert(0, '.')
 from app.database import SessionLocal, Base, engine
@@ -174,99 +418,161 @@ Base.metadata.drop_all(bind=engine)
 Base.metadata.create_all(bind=engine)
 print("Tables cleared and recreated")
 """
+
+
+# Repository root, which holds the backend's app package
+_PROJECT_ROOT = str(Path(__file__).resolve().parent.parent.parent)
+
+
+def _reset_tables_in_process() -> None:
+    """Drop and recreate the marketplace tables using the backend's own engine."""
+    # Added at most once, however many battles run
+    if _PROJECT_ROOT not in sys.path:
+        sys.path.insert(0, _PROJECT_ROOT)
+
+    # Imported lazily - only the reset path needs the backend models. Module
+    # aliases keep the model classes from shadowing the Buyer/Seller tuples here.
+    from app.database import Base, engine
+    from app.models import purchase as purchase_models  # noqa: F401 - registers the table
+    from app.models import product as product_models  # noqa: F401
+    from app.models import buyer as buyer_models  # noqa: F401
+    from app.models import seller as seller_models  # noqa: F401
+    from app.models import image as image_models  # noqa: F401
+
+    Base.metadata.drop_all(bind=engine)
+    Base.metadata.create_all(bind=engine)
+
+
+@lru_cache(maxsize=1)
+def _load_image_script(script_path: Path):
+    """Import the image creation script once per process (it pulls in openai)."""
+    spec = importlib.util.spec_from_file_location("create_image_descriptions", script_path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+async def _reload_images_in_process(script_path: Path, timeout_seconds: int) -> None:
+    """
+    Run the image creation script's reload_all() in a worker thread.
+
+    On timeout the worker is asked to stop and awaited, so no images are still
+    being written once this raises asyncio.TimeoutError.
+    """
+    module = _load_image_script(script_path)
+    stop_event = threading.Event()
+    worker = asyncio.ensure_future(asyncio.to_thread(module.reload_all, stop_event=stop_event))
+    try:
+        await asyncio.wait_for(asyncio.shield(worker), timeout_seconds)
+    except asyncio.TimeoutError:
+        stop_event.set()
+        # Let the image in progress finish; the timeout is what gets reported
+        await asyncio.gather(worker, return_exceptions=True)
+        raise
+
+
+async def _run_uv_python(args: list[str], cwd: Path, timeout_seconds: int) -> tuple[int, str, str]:
+    """
+    Run `uv run python <args>` without blocking the event loop.
+
+    Returns:
+        (returncode, stdout, stderr). The process is killed if it exceeds the timeout.
+    """
+    # Pass environment variables to ensure it uses the same database
+    process = await asyncio.create_subprocess_exec(
+        "uv", "run", "python", *args,
+        cwd=str(cwd),
+        env=os.environ.copy(),
+        stdout=asyncio.subprocess.PIPE,
+        stderr=asyncio.subprocess.PIPE,
+    )
+    try:
+        stdout, stderr = await asyncio.wait_for(process.communicate(), timeout_seconds)
+    except asyncio.TimeoutError:
+        process.kill()
+        await process.wait()
+        raise
+    return process.returncode, stdout.decode(errors="replace"), stderr.decode(errors="replace")
+
+
+async def clear_database(state: BattleState):
+    """Clear all data from the database tables, in-process when the backend is importable"""
+    try:
+        logger.info("🗑️  Clearing database...")
+        if state.battle_context:
+            _record_event(state, "Clearing database...")
         
-        # Run the script using uv run to ensure correct environment
-        env = os.environ.copy()
-        result = subprocess.run(
-            ["uv", "run", "python", "-c", clear_script],
-            cwd=str(project_root),
-            env=env,
-            capture_output=True,
-            text=True,
-            timeout=30
-        )
+        stderr = ""
+        try:
+            await asyncio.to_thread(_reset_tables_in_process)
+            returncode = 0
+        except ImportError:
+            # Backend dependencies aren't installed here - run in the project environment instead
+            returncode, _, stderr = await _run_uv_python(
+                ["-c", _CLEAR_DATABASE_SCRIPT], Path(__file__).parent.parent.parent, 30
+            )
         
-        if result.returncode == 0:
+        if returncode == 0:
             message = "✅ Database cleared and tables recreated"
-            print(message)
-            if battle_context:
-                record_battle_event(battle_context, "Database cleared and tables recreated")
+            logger.info(message)
+            if state.battle_context:
+                _record_event(state, "Database cleared and tables recreated")
         else:
-            warning = f"⚠️  Warning: Failed to clear database (code {result.returncode})"
-            print(warning)
-            print(f"   stderr: {result.stderr}")
-            if battle_context:
-                record_battle_event(battle_context, f"Failed to clear database (code {result.returncode})")
+            warning = f"⚠️  Warning: Failed to clear database (code {returncode})"
+            logger.warning("%s\n   stderr: %s", warning, stderr)
+            if state.battle_context:
+                _record_event(state, f"Failed to clear database (code {returncode})")
             
     except Exception as e:
-        error_msg = f"⚠️  Warning: Failed to clear database: {e}"
-        print(error_msg)
-        if battle_context:
-            record_battle_event(battle_context, f"Failed to clear database: {str(e)}")
-        import traceback
-        traceback.print_exc()
+        logger.exception("⚠️  Warning: Failed to clear database: %s", e)
+        if state.battle_context:
+            _record_event(state, f"Failed to clear database: {str(e)}")
 
 
-def reload_images():
-    """Reload images from the images directory using the creation script"""
+async def reload_images(state: BattleState):
+    """Reload images from the images directory, in-process when the creation script is importable"""
     try:
-        print("📸 Reloading images from images directory...")
-        if battle_context:
-            record_battle_event(battle_context, "Reloading images from database...")
+        logger.info("📸 Reloading images from images directory...")
+        if state.battle_context:
+            _record_event(state, "Reloading images from database...")
         
         # Get the path to the images directory and script
         project_root = Path(__file__).parent.parent.parent
         images_dir = project_root / "images"
         script_path = images_dir / "create_image_descriptions.py"
         
-        print(f"   Script path: {script_path}")
-        print(f"   Working directory: {images_dir}")
+        logger.info("   Script path: %s\n   Working directory: %s", script_path, images_dir)
         
         if not script_path.exists():
             warning = f"⚠️  Warning: Image creation script not found at {script_path}"
-            print(warning)
-            if battle_context:
-                record_battle_event(battle_context, "Image creation script not found")
+            logger.warning(warning)
+            if state.battle_context:
+                _record_event(state, "Image creation script not found")
             return
         
-        # Run the script to reload images using uv run to ensure correct environment
-        # Pass environment variables to ensure it uses the same database
-        env = os.environ.copy()
-        result = subprocess.run(
-            ["uv", "run", "python", str(script_path)],
-            cwd=str(images_dir),
-            env=env,
-            capture_output=True,
-            text=True,
-            timeout=60
-        )
+        stdout = stderr = ""
+        try:
+            await _reload_images_in_process(script_path, 60)
+            returncode = 0
+        except ImportError:
+            # Script dependencies aren't installed here - run it in the project environment instead
+            returncode, stdout, stderr = await _run_uv_python([str(script_path)], images_dir, 60)
         
-        if result.returncode == 0:
+        if returncode == 0:
             message = "✅ Images reloaded successfully"
-            print(message)
-            # Print last few lines of output to confirm
-            output_lines = result.stdout.strip().split('\n')
-            if len(output_lines) > 5:
-                print("   Last lines of output:")
-                for line in output_lines[-5:]:
-                    print(f"   {line}")
-            if battle_context:
-                record_battle_event(battle_context, "Images reloaded successfully")
+            logger.info(message)
+            if state.battle_context:
+                _record_event(state, "Images reloaded successfully")
         else:
-            warning = f"⚠️  Warning: Image reload script failed with code {result.returncode}"
-            print(warning)
-            print(f"   stderr: {result.stderr}")
-            print(f"   stdout: {result.stdout}")
-            if battle_context:
-                record_battle_event(battle_context, f"Image reload failed (code {result.returncode})")
+            warning = f"⚠️  Warning: Image reload script failed with code {returncode}"
+            logger.warning("%s\n   stderr: %s\n   stdout: %s", warning, stderr, stdout)
+            if state.battle_context:
+                _record_event(state, f"Image reload failed (code {returncode})")
             
     except Exception as e:
-        error_msg = f"⚠️  Warning: Failed to reload images: {e}"
-        print(error_msg)
-        if battle_context:
-            record_battle_event(battle_context, f"Failed to reload images: {str(e)}")
-        import traceback
-        traceback.print_exc()
+        logger.exception("⚠️  Warning: Failed to reload images: %s", e)
+        if state.battle_context:
+            _record_event(state, f"Failed to reload images: {str(e)}")
 
 
 @ab.tool
@@ -286,8 +592,8 @@ async def handle_incoming_message(message: str) -> str:
     try:
         # Parse the message as JSON
         try:
-            message_data = json.loads(message)
-        except json.JSONDecodeError:
+            message_data = json_loads(message)
+        except ValueError:  # stdlib and orjson decode errors are both ValueErrors
             return f"Received non-JSON message: {message}"
 
         # Check if this is a battle start message
@@ -311,7 +617,13 @@ async def handle_incoming_message(message: str) -> str:
 
             # Now orchestrate the battle automatically
             # Note: Battle context will be stored in metadata AFTER database clear
-            return await orchestrate_battle(battle_id, seller_infos, green_battle_context)
+            try:
+                return await orchestrate_battle(
+                    battle_id, seller_infos, green_battle_context, battle_context
+                )
+            finally:
+                # Don't leave the tail of the battle sitting in the log buffer
+                flush_logs()
 
         return f"Received message of type: {message_data.get('type', 'unknown')}"
 
@@ -319,7 +631,12 @@ async def handle_incoming_message(message: str) -> str:
         return f"Error processing message: {str(e)}"
 
 
-async def orchestrate_battle(battle_id: str, seller_infos: list, green_battle_context: dict) -> str:
+async def orchestrate_battle(
+    battle_id: str,
+    seller_infos: list,
+    green_battle_context: dict,
+    battle_context: BattleContext | None,
+) -> str:
     """
     Orchestrate the dummy battle: send questions, collect responses, evaluate, and report.
 
@@ -327,371 +644,327 @@ async def orchestrate_battle(battle_id: str, seller_infos: list, green_battle_co
         battle_id: The battle ID
         seller_infos: List of seller info dicts with 'agent_url' and 'name'
         green_battle_context: Battle context data to store in metadata
+        battle_context: Context this battle's events are recorded under
 
     Returns:
         str: Battle completion summary
     """
 
-    global battle_context, sellers, buyers
-
     if not battle_context:
         return "Error: Battle context not initialized"
 
-    record_battle_event(battle_context, "Battle orchestration started")
-
-    # Clear database and reload images at the start
-    clear_database()
-    reload_images()
+    # Participants, the applied phase and the event queue are tracked per
+    # battle, so concurrent or repeated battles never see each other's state
+    state = BattleState(battle_context=battle_context)
+    _start_event_drainer(state)
+    try:
+        return await _run_battle(state, battle_id, seller_infos, green_battle_context)
+    finally:
+        await _stop_event_drainer(state)
 
-    await set_battle_metadata(battle_id, green_battle_context.get("backend_url"))
 
-    rounds_env = os.getenv("MARKETPLACE_ROUNDS") or os.getenv("SIMULATION_ROUNDS")
-    days_env = os.getenv("MARKETPLACE_DAYS") or os.getenv("SIMULATION_DAYS")
+async def _run_battle(
+    state: BattleState, battle_id: str, seller_infos: list, green_battle_context: dict
+) -> str:
+    _record_event(state, "Battle orchestration started")
 
-    try:
-        rounds = int(rounds_env) if rounds_env else 3
-    except (TypeError, ValueError):
-        rounds = 3
+    # Clear database first - the metadata table is dropped and recreated too
+    await clear_database(state)
+    # Images and battle metadata only need the fresh schema, not each other
+    await asyncio.gather(
+        reload_images(state),
+        set_battle_metadata(battle_id, green_battle_context.get("backend_url")),
+    )
 
-    try:
-        days = int(days_env) if days_env else 5
-    except (TypeError, ValueError):
-        days = 5
+    rounds, days = ROUNDS, DAYS
 
-    if battle_context:
-        record_battle_event(
-            battle_context,
+    if state.battle_context:
+        _record_event(
+            state,
             f"Configuring battle for {rounds} round(s) with {days} day(s) each",
         )
 
     try:
-        await create_sellers(seller_infos)
-        await create_buyer()
-        print(sellers)
-        print(buyers)
+        # Seller and buyer setup touch different accounts, so run them side by side.
+        # A TaskGroup cancels the other side if one fails instead of leaving it running.
+        try:
+            async with asyncio.TaskGroup() as setup:
+                setup.create_task(create_sellers(state, seller_infos))
+                setup.create_task(create_buyer(state))
+        except ExceptionGroup as eg:
+            # Report the underlying error, not the group wrapper
+            raise eg.exceptions[0] from eg
 
         for current_round in range(1, rounds + 1):
-            set_marketplace_round(current_round)
-            set_marketplace_day(0)
+            await advance_marketplace(
+                state, round_number=current_round, day=0, phase=Phase.SELLER_MANAGEMENT
+            )
 
-            if battle_context:
-                record_battle_event(
-                    battle_context,
+            if state.battle_context:
+                _record_event(
+                    state,
                     f"Round {current_round}/{rounds} started",
                 )
 
             # Day 0 preparation
-            change_phase(Phase.SELLER_MANAGEMENT)
             if current_round == 1:
-                await create_listings()
+                await create_listings(state)
             else:
-                await sellers_update_listings()
-            await create_ranking()
+                await sellers_update_listings(state)
+            await create_ranking(state)
 
-            change_phase(Phase.BUYER_SHOPPING)
-            await buyers_buy_products()
+            await change_phase(state, Phase.BUYER_SHOPPING)
+            await buyers_buy_products(state)
 
             for current_day in range(1, days):
-                set_marketplace_day(current_day)
-                await update_ranking()
-
-                change_phase(Phase.SELLER_MANAGEMENT)
-                await sellers_update_listings()
+                # Ranking uses the round's sales, not the day, so these can overlap
+                await asyncio.gather(
+                    advance_marketplace(state, day=current_day, phase=Phase.SELLER_MANAGEMENT),
+                    update_ranking(state),
+                )
+                await sellers_update_listings(state)
 
-                change_phase(Phase.BUYER_SHOPPING)
-                await buyers_buy_products()
+                await change_phase(state, Phase.BUYER_SHOPPING)
+                await buyers_buy_products(state)
 
-            if battle_context:
-                record_battle_event(
-                    battle_context,
+            if state.battle_context:
+                _record_event(
+                    state,
                     f"Round {current_round}/{rounds} completed",
                 )
 
     except Exception as e:
         error_msg = f"Error orchestrating battle: {str(e)}"
-        record_battle_event(battle_context, error_msg)
+        _record_event(state, error_msg)
         return error_msg
 
     finally:
         try:
-            change_phase(Phase.OPEN)
+            await change_phase(state, Phase.OPEN)
         except Exception as phase_error:
             warning = f"Failed to reset marketplace phase: {phase_error}"
-            if battle_context:
-                record_battle_event(battle_context, warning)
-            print(warning)
+            if state.battle_context:
+                _record_event(state, warning)
+            logger.warning(warning)
 
-    await report_leaderboard()
+    await report_leaderboard(state)
     
 
 
 
-async def create_sellers(seller_infos: list):
+async def _create_seller_account() -> dict:
+    # todo: add super admin auth token
+    logger.info("🥥 Creating seller")
+    async with _account_creation_semaphore:
+        return await _post_json("/createSeller")
+
+
+async def create_sellers(state: BattleState, seller_infos: list):
     seller_names = {}  # Map seller_id to agent_name
     
-    for seller_info in seller_infos:
-        # todo: add super admin auth token
-        print("🥥 Creating seller")
-        response = requests.post(
-            api_url + "/createSeller",
-            headers={"X-Admin-Key": admin_api_key} if admin_api_key else None,
-        )
-        if response.status_code != 200:
-            raise Exception(f"Failed to create seller: {response.text}")
+    # Seller accounts are independent, so create them concurrently (results keep input order)
+    created = await asyncio.gather(*(_create_seller_account() for _ in seller_infos))
 
-        json = response.json()
-        id = json.get("id")
-        token = json.get("auth_token")
+    for seller_info, data in zip(seller_infos, created):
+        id = data.get("id")
+        token = data.get("auth_token")
         agent_name = seller_info.get("name", "Unknown Seller")
-        sellers.append(Seller(id=id, url=seller_info.get("agent_url"), token=token, name=agent_name))
+        state.sellers[id] = Seller(id=id, url=seller_info.get("agent_url"), token=token, name=agent_name)
         seller_names[id] = agent_name
         
         message = f"🥥 Created seller {id} ({agent_name})"
-        print(message)
-        if battle_context:
-            record_battle_event(battle_context, f"Created seller {id} ({agent_name})")
+        logger.info(message)
+        if state.battle_context:
+            _record_event(state, f"Created seller {id} ({agent_name})")
     
     # Store seller names in metadata so seller agents can retrieve their actual names
     try:
-        headers = {"X-Admin-Key": admin_api_key} if admin_api_key else None
-        import json as json_module
-        requests.post(
-            f"{api_url}/admin/metadata/seller_names",
-            json={"seller_names": seller_names},
-            headers=headers
-        )
-        print(f"✅ Stored seller names in metadata: {seller_names}")
+        await _post_json("/admin/metadata/seller_names", {"seller_names": seller_names})
+        logger.info("✅ Stored seller names in metadata: %s", seller_names)
     except Exception as e:
-        print(f"⚠️  Warning: Failed to store seller names: {e}")
+        logger.warning("⚠️  Warning: Failed to store seller names: %s", e)
 
 
 async def set_battle_metadata(battle_id: str, backend_url: str):
     try:
-        headers = {"X-Admin-Key": admin_api_key} if admin_api_key else None
-        requests.post(
-            f"{api_url}/admin/metadata",
-            json={"battle_id": battle_id, "backend_url": backend_url},
-            headers=headers
-        )
-        print(f"✅ Stored battle metadata: {battle_id}, {backend_url}")
+        await _post_json("/admin/metadata", {"battle_id": battle_id, "backend_url": backend_url})
+        logger.info("✅ Stored battle metadata: %s, %s", battle_id, backend_url)
     except Exception as e:
-        print(f"⚠️  Warning: Failed to store battle metadata: {e}")
+        logger.warning("⚠️  Warning: Failed to store battle metadata: %s", e)
 
 
-async def create_buyer():
-    """Create buyers based on configuration from tools/scenario.toml"""
-    # Load scenario configuration
-    scenario_path = Path(__file__).parent.parent.parent / "tools" / "scenario.toml"
+SCENARIO_PATH = Path(__file__).parent.parent.parent / "tools" / "scenario.toml"
 
-    if not scenario_path.exists():
-        raise Exception(f"Scenario file not found at {scenario_path}")
 
-    scenario_config = toml.load(scenario_path)
+class BuyerAgent(NamedTuple):
+    name: str | None
+    url: str
 
-    # Filter agents where card filename starts with "buyer_"
-    buyer_agents = [
-        agent
-        for agent in scenario_config.get("agents", [])
-        if Path(agent["card"]).name.startswith("buyer_")
-    ]
 
-    # Create buyers based on the configuration
-    for buyer_agent in buyer_agents:
-        agent_host = buyer_agent.get("agent_host")
-        agent_port = buyer_agent.get("agent_port")
-        configured_name = buyer_agent.get("name")
-        buyer_display_name = configured_name or f"Buyer {len(buyers) + 1}"
+@lru_cache(maxsize=1)
+def _parse_buyer_agents(mtime_ns: int) -> tuple[BuyerAgent, ...]:
+    """Parse tools/scenario.toml into buyer agent entries (cached per file version)."""
+    # Only needed here, so keep it off the import path of the agent
+    import tomllib
+
+    with open(SCENARIO_PATH, "rb") as f:
+        scenario_config = tomllib.load(f)
 
+    buyer_agents = []
+    # Filter agents where card filename starts with "buyer_"
+    for agent in scenario_config.get("agents", []):
+        if not Path(agent["card"]).name.startswith("buyer_"):
+            continue
+        agent_port = agent.get("agent_port")
         if not agent_port:
-            raise Exception(
-                f"No agent_port found for buyer agent: {buyer_agent.get('name')}"
-            )
+            raise Exception(f"No agent_port found for buyer agent: {agent.get('name')}")
+        # todo: is that a problem that the buyer has to run local (because of the http://)?
+        url = f"http://{agent.get('agent_host')}:{agent_port}"
+        buyer_agents.append(BuyerAgent(name=agent.get("name"), url=url))
+    return tuple(buyer_agents)
 
-        # Create buyer via API
-        response = requests.post(
-            api_url + "/createBuyer",
-            json={"name": buyer_display_name},
-            headers={"X-Admin-Key": admin_api_key} if admin_api_key else None,
-        )
 
-        if response.status_code != 200:
-            raise Exception(f"Failed to create buyer: {response.text}")
+def _load_buyer_agents() -> tuple[BuyerAgent, ...]:
+    """Return the buyer agents from tools/scenario.toml, re-parsing only when the file changes."""
+    if not SCENARIO_PATH.exists():
+        raise Exception(f"Scenario file not found at {SCENARIO_PATH}")
+    return _parse_buyer_agents(SCENARIO_PATH.stat().st_mtime_ns)
+
+
+async def create_buyer(state: BattleState):
+    """Create buyers based on configuration from tools/scenario.toml"""
+    buyer_agents = _load_buyer_agents()
+    display_names = [
+        agent.name or f"Buyer {len(state.buyers) + index}"
+        for index, agent in enumerate(buyer_agents, start=1)
+    ]
+
+    async def _create_buyer_account(buyer_display_name: str) -> dict:
+        async with _account_creation_semaphore:
+            return await _post_json("/createBuyer", {"name": buyer_display_name})
+
+    # Create buyers via API concurrently (results keep configuration order)
+    created = await asyncio.gather(
+        *(_create_buyer_account(name) for name in display_names)
+    )
 
-        buyer_data = response.json()
+    for buyer_agent, buyer_display_name, buyer_data in zip(buyer_agents, display_names, created):
         stored_name = buyer_data.get("name", buyer_display_name)
         # Store buyer with URL constructed from agent configuration
-        # todo: is that a problem that the buyer has to run local (because of the http://)?
-        url = f"http://{agent_host}:{agent_port}"
         buyer_id = buyer_data.get("id")
-        buyers.append(
-            Buyer(
-                id=buyer_id,
-                url=url,
-                token=buyer_data.get("auth_token"),
-                name=stored_name,
-            )
+        state.buyers[buyer_id] = Buyer(
+            id=buyer_id,
+            url=buyer_agent.url,
+            token=buyer_data.get("auth_token"),
+            name=stored_name,
         )
         
         message = f"🛒 Created buyer {buyer_id} ({stored_name})"
-        print(message)
-        if battle_context:
-            record_battle_event(battle_context, f"Created buyer {buyer_id} ({stored_name})")
+        logger.info(message)
+        if state.battle_context:
+            _record_event(state, f"Created buyer {buyer_id} ({stored_name})")
 
 
-async def create_participants(no_participants: int, route: str):
+async def create_participants(state: BattleState, no_participants: int, route: str):
     for i in range(no_participants):
-        request_kwargs = {
-            "headers": {"X-Admin-Key": admin_api_key} if admin_api_key else None,
-        }
+        payload = None
         if route == "/createBuyer":
-            request_kwargs["json"] = {"name": f"Buyer {len(buyers) + 1}"}
+            payload = {"name": f"Buyer {len(state.buyers) + 1}"}
         # todo: add super admin auth token
-        response = requests.post(
-            api_url + route,
-            **request_kwargs,
-        )
-        if response.status_code != 200:
-            raise Exception(f"Failed to create seller: {response.text}")
+        created = await _post_json(route, payload)
 
         # todo: confirm if that actually works
         if route == "/createSeller":
-            sellers.append(response.json())
+            state.sellers[created.get("id")] = created
         elif route == "/createBuyer":
-            buyers.append(response.json())
+            state.buyers[created.get("id")] = created
 
-        return response.json()
+        return created
 
 
-async def create_listings():
+async def create_listings(state: BattleState):
     timeout_minutes = 2  # Timeout duration in minutes
     timeout_seconds = timeout_minutes * 60
 
-    prompt_template = """
-Call /createProduct to create a product.
-
-Your seller ID: {id}
-Your auth token: {token}
+    await _send_prompts_to_agents(state, state.sellers.values(), CREATE_LISTINGS_PROMPT, "Telling sellers to create products...", timeout_seconds)
 
-Use the auth token in the Authorization header as "Bearer {token}" when making API calls.
 
-Response format:
-{{
-    "product_id": "123", # id of the product you created
-}}
-        """
-
-    await _send_prompts_to_agents(sellers, prompt_template, "Telling sellers to create products...", timeout_seconds)
-
-
-async def create_ranking():
+async def create_ranking(state: BattleState):
     # Initialize rankings with random values via API
-    response = requests.post(f"{api_url}/rankings/initialize")
-    if response.status_code != 200:
-        raise Exception(f"Failed to initialize rankings: {response.text}")
-    
-    result = response.json()
+    result = await _post_json("/rankings/initialize")
     message = f"✅ {result['message']}"
-    print(message)
-    if battle_context:
-        record_battle_event(battle_context, result['message'])
+    logger.info(message)
+    if state.battle_context:
+        _record_event(state, result['message'])
 
 
-async def update_ranking():
+async def update_ranking(state: BattleState):
     # Update rankings based on sales performance via API
-    response = requests.post(f"{api_url}/rankings/update-by-sales")
-    if response.status_code != 200:
-        warning = f"Warning: Failed to update rankings: {response.text}"
-        print(warning)
-        if battle_context:
-            record_battle_event(battle_context, warning)
+    try:
+        result = await _post_json("/rankings/update-by-sales")
+    except httpx.HTTPStatusError as e:
+        warning = f"Warning: Failed to update rankings: {e.response.text}"
+        logger.warning(warning)
+        if state.battle_context:
+            _record_event(state, warning)
         return
     
-    result = response.json()
     message = f"✅ {result['message']}"
-    print(message)
-    if battle_context:
-        record_battle_event(battle_context, result['message'])
+    logger.info(message)
+    if state.battle_context:
+        _record_event(state, result['message'])
     
     # Log top products for visibility
     if "top_products" in result:
-        print("📊 Top 5 products by sales:")
-        top_products_summary = []
-        for product in result["top_products"]:
-            product_line = f"   Rank {product['ranking']}: {product['product_name']} ({product['sales_count']} sales)"
-            print(product_line)
-            top_products_summary.append(f"#{product['ranking']} {product['product_name']} ({product['sales_count']} sales)")
+        top_products = result["top_products"]
+        logger.info("📊 Top 5 products by sales:\n%s", "\n".join(
+            f"   Rank {product['ranking']}: {product['product_name']} ({product['sales_count']} sales)"
+            for product in top_products
+        ))
         
-        if battle_context and top_products_summary:
-            record_battle_event(battle_context, f"📊 Top products: {', '.join(top_products_summary[:3])}")
+        # Only the top three make it into the battle log
+        top_products_summary = [
+            f"#{product['ranking']} {product['product_name']} ({product['sales_count']} sales)"
+            for product in top_products[:3]
+        ]
+        if state.battle_context and top_products_summary:
+            _record_event(state, f"📊 Top products: {', '.join(top_products_summary)}")
 
 
-async def buyers_buy_products():
+async def buyers_buy_products(state: BattleState):
     timeout_minutes = 2  # Timeout duration in minutes
     timeout_seconds = timeout_minutes * 60
 
-    prompt_template = """
-Call /search?q=keyword to find your product you want to buy. You can call /product/{{id}} to get more details about the product.
-
-Your buyer ID: {id}
-Your auth token: {token}
-
-Use the auth token in the Authorization header as "Bearer {token}" when making API calls.
-
-Response even if you decided not to buy a product.
+    await _send_prompts_to_agents(state, state.buyers.values(), BUY_PRODUCTS_PROMPT, "Telling buyers to buy products...", timeout_seconds)
 
-Response format:
-{{
-    "product_id": "123", # id of the product you bought, null if you decided not to buy a product
-    "decision": "buy" or "not buy"
-}}
-        """
 
-    await _send_prompts_to_agents(buyers, prompt_template, "Telling buyers to buy products...", timeout_seconds)
-
-
-async def sellers_update_listings():
+async def sellers_update_listings(state: BattleState):
     timeout_minutes = 2  # Timeout duration in minutes
     timeout_seconds = timeout_minutes * 60
 
-    prompt_template = """
-Call /updateProduct to update your product.
-
-Your seller ID: {id}
-Your auth token: {token}
-
-Use the auth token in the Authorization header as "Bearer {token}" when making API calls.
-
-Response format:
-{{
-    "product_id": "123", # id of the product you updated
-}}
-        """
-
-    await _send_prompts_to_agents(sellers, prompt_template, "Telling sellers to update products...", timeout_seconds)
+    await _send_prompts_to_agents(state, state.sellers.values(), UPDATE_LISTINGS_PROMPT, "Telling sellers to update products...", timeout_seconds)
 
 
-async def report_leaderboard():
+async def report_leaderboard(state: BattleState):
     """Queries the purchase history and reports a leaderboard (total profit,
     etc.) to AgentBeats."""
-    global battle_context, sellers
-
-    if not battle_context:
-        print("Warning: Battle context not initialized")
+    if not state.battle_context:
+        logger.warning("Warning: Battle context not initialized")
         return
 
     try:
         # Step 1: Fetch leaderboard data from API
-        record_battle_event(battle_context, "Fetching leaderboard data")
-        response = requests.get(f"{api_url}/buy/stats/leaderboard")
-
-        if response.status_code != 200:
-            error_msg = f"Failed to fetch leaderboard: {response.text}"
-            record_battle_event(battle_context, error_msg)
+        _record_event(state, "Fetching leaderboard data")
+        try:
+            leaderboard_payload = await _get_json("/buy/stats/leaderboard")
+        except httpx.HTTPStatusError as e:
+            error_msg = f"Failed to fetch leaderboard: {e.response.text}"
+            _record_event(state, error_msg)
             return
 
-        leaderboard_payload = response.json()
-
-        seller_names = { seller.id: seller.name for seller in sellers }
+        def seller_name(seller_id: str) -> str | None:
+            seller = state.sellers.get(seller_id)
+            return seller.name if seller else None
 
         rounds_data = leaderboard_payload.get("rounds", [])
         overall_section = leaderboard_payload.get("overall", {})
@@ -699,7 +972,8 @@ async def report_leaderboard():
         overall_winners = overall_section.get("winners", [])
         current_round = leaderboard_payload.get("current_round")
 
-        # Step 2: Log per-round summaries
+        # Step 2: Log per-round summaries (one event for all rounds)
+        round_summaries = []
         for round_entry in rounds_data:
             round_number = round_entry.get("round")
             winners = round_entry.get("winners", [])
@@ -715,38 +989,38 @@ async def report_leaderboard():
                     f"top profit ${top_entry['total_profit_dollars']:.2f} (seller {top_entry['seller_id']})"
                 )
 
-            record_battle_event(battle_context, "; ".join(summary_parts))
+            round_summaries.append("; ".join(summary_parts))
 
-        # Step 3: Calculate overall scores
-        scores = {}
-        for entry in overall_leaderboard:
-            seller_id = entry["seller_id"]
-            seller_name = seller_names.get(seller_id)
-            profit_cents = entry["total_profit_cents"]
-            purchase_count = entry["purchase_count"]
-            round_wins = entry.get("round_wins", 0)
+        if round_summaries:
+            _record_event(state, "\n".join(round_summaries))
 
-            scores[seller_id] = {
-                "seller_name": seller_name,
-                "profit_cents": profit_cents,
+        # Step 3: Calculate overall scores (one event for all sellers)
+        scores = {
+            entry["seller_id"]: {
+                "seller_name": seller_name(entry["seller_id"]),
+                "profit_cents": entry["total_profit_cents"],
                 "profit_dollars": entry["total_profit_dollars"],
-                "purchase_count": purchase_count,
-                "round_wins": round_wins,
+                "purchase_count": entry["purchase_count"],
+                "round_wins": entry.get("round_wins", 0),
             }
+            for entry in overall_leaderboard
+        }
 
-            record_battle_event(
-                battle_context,
-                (
-                    f"Overall - Seller {seller_name} ({seller_id}): "
-                    f"{round_wins} round win(s), "
-                    f"${entry['total_profit_dollars']:.2f} profit, "
-                    f"{purchase_count} purchases"
+        if scores:
+            _record_event(
+                state,
+                "\n".join(
+                    f"Overall - Seller {score['seller_name']} ({seller_id}): "
+                    f"{score['round_wins']} round win(s), "
+                    f"${score['profit_dollars']:.2f} profit, "
+                    f"{score['purchase_count']} purchases"
+                    for seller_id, score in scores.items()
                 ),
             )
 
         if overall_winners:
             primary_winner_id = overall_winners[0]
-            primary_winner_name = seller_names.get(primary_winner_id)
+            primary_winner_name = seller_name(primary_winner_id)
             winner_stats = scores.get(primary_winner_id, {})
             winner_round_wins = winner_stats.get("round_wins", 0)
             winner_profit_dollars = winner_stats.get("profit_dollars", 0.0)
@@ -778,8 +1052,10 @@ async def report_leaderboard():
             "scores": scores,
         }
 
+        # The result must land after every event of the battle
+        await _flush_events(state)
         record_battle_result(
-            battle_context,
+            state.battle_context,
             summary,
             f"{primary_winner_name} ({primary_winner_id})",
             result_detail,
@@ -787,15 +1063,41 @@ async def report_leaderboard():
 
     except Exception as e:
         error_msg = f"Error reporting leaderboard: {str(e)}"
-        record_battle_event(battle_context, error_msg)
-        print(error_msg)
+        _record_event(state, error_msg)
+        logger.error(error_msg)
 
 
-async def _send_prompts_to_agents(agents: list, prompt_template: str, log_message: str, timeout_seconds: int):
+async def _prompt_with_timeout(state: BattleState, target_url: str, prompt: str, label: str, timeout_seconds: int):
+    """Send one prompt to an agent, logging (not raising) timeouts and errors."""
+    try:
+        async with _agent_semaphore:
+            return await asyncio.wait_for(send_message_to_agent(target_url, prompt), timeout_seconds)
+    except asyncio.TimeoutError:
+        warning = f"Agent {label} did not respond within {timeout_seconds}s"
+    except Exception as e:
+        warning = f"Failed to message agent {label}: {e}"
+
+    logger.warning("⚠️  %s", warning)
+    if state.battle_context:
+        _record_event(state, warning)
+    return None
+
+
+async def _send_prompts_to_agents(state: BattleState, agents: Collection[Seller | Buyer], prompt_template: str, log_message: str, timeout_seconds: int):
     """Helper to send a templated prompt to a list of agents."""
-    if battle_context:
-        record_battle_event(battle_context, log_message)
+    if not agents:
+        return
+    if state.battle_context:
+        _record_event(state, log_message)
     
-    messages = [prompt_template.format(id=agent.id, token=agent.token) for agent in agents]
-    target_urls = [agent.url for agent in agents]
-    await send_messages_to_agents(target_urls, messages, timeout_seconds)
+    # Agents are independent, so prompt them all at once; each gets its own timeout
+    await asyncio.gather(*(
+        _prompt_with_timeout(
+            state,
+            agent.url,
+            prompt_template.format(id=agent.id, token=agent.token),
+            agent.name or agent.id,
+            timeout_seconds,
+        )
+        for agent in agents
+    ))
@@ -0,0 +1,112 @@
+"""
+Marketplace API Client
+
+Shared HTTP plumbing for the buyer and seller agent tools. Both shared tools
+modules import this module, so every agent process keeps a single connection
+pool to the marketplace API.
+"""
+
+import json
+import logging
+import os
+from functools import lru_cache
+from typing import Optional
+
+import httpx
+
+try:
+    import orjson
+except ImportError:  # orjson is optional - fall back to the stdlib parser
+    orjson = None
+
+try:
+    import h2  # noqa: F401 - presence enables HTTP/2 in httpx
+    HTTP2_ENABLED = True
+except ImportError:  # install httpx[http2] to multiplex requests over one connection
+    HTTP2_ENABLED = False
+
+logger = logging.getLogger("marketplace_client")
+
+# API configuration
+API_URL = os.getenv("MARKETPLACE_API_URL", "http://localhost:8000")
+# Connect/read timeouts in seconds so a stalled backend cannot hang a tool call
+REQUEST_TIMEOUT = httpx.Timeout(10.0, connect=3.0)
+
+# Shared async HTTP client - keeps connections to the marketplace API alive between
+# tool calls and lets concurrent requests share the pool instead of blocking the loop.
+# With HTTP/2 (negotiated over TLS) concurrent requests share a single connection.
+# Transport retries only cover connection failures, so writes are never sent twice.
+# Pool settings live on the transport because httpx ignores client-level ones
+# when an explicit transport is given.
+client = httpx.AsyncClient(
+    base_url=API_URL,
+    timeout=REQUEST_TIMEOUT,
+    transport=httpx.AsyncHTTPTransport(
+        retries=3,
+        http2=HTTP2_ENABLED,
+        limits=httpx.Limits(max_connections=100, max_keepalive_connections=20),
+    ),
+)
+
+
+# Last known good battle metadata and its ETag. The body is reused when the
+# backend answers 304, and as a stale fallback while the backend is unreachable.
+_metadata_etag: Optional[str] = None
+_last_good_metadata: Optional[dict] = None
+
+
+@lru_cache(maxsize=4)
+def get_auth_header(auth_token: str) -> dict:
+    """Helper to create authorization header (cached per token - do not mutate the result)"""
+    return {"Authorization": f"Bearer {auth_token}"}
+
+
+def json_loads(data: str | bytes):
+    """Parse a JSON document (response body or message), using orjson when it is installed."""
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def json_dumps(obj) -> bytes:
+    """Serialize a JSON request body, using orjson when it is installed."""
+    if orjson is not None:
+        return orjson.dumps(obj)
+    return json.dumps(obj).encode()
+
+
+async def get_battle_metadata() -> tuple[int, Optional[dict]]:
+    """
+    Fetch battle metadata with a conditional GET.
+
+    Returns:
+        (status_code, metadata). A 304 Not Modified is reported as 200 with the
+        cached body. If the request fails or returns an error status, the last
+        known good metadata is returned as 200 when there is one; otherwise
+        metadata is None.
+    """
+    global _metadata_etag, _last_good_metadata
+
+    headers = {"If-None-Match": _metadata_etag} if _metadata_etag else None
+    try:
+        response = await client.get("/admin/metadata", headers=headers)
+    except httpx.HTTPError:
+        if _last_good_metadata is None:
+            raise
+        logger.warning("⚠️  Marketplace API unreachable - using stale battle metadata")
+        return 200, _last_good_metadata
+
+    if response.status_code == 304:
+        return 200, _last_good_metadata
+    if response.status_code != 200:
+        if _last_good_metadata is not None:
+            logger.warning(
+                "⚠️  Metadata request failed (status %s) - using stale battle metadata",
+                response.status_code,
+            )
+            return 200, _last_good_metadata
+        return response.status_code, None
+
+    _last_good_metadata = json_loads(response.content)
+    _metadata_etag = response.headers.get("ETag")
+    return 200, _last_good_metadata
@@ -4,16 +4,15 @@ AgentBeats Tools for Seller Agents
 These tools allow seller agents to interact with the marketplace API.
 """
 
-import os
 import sys
+import time
 from pathlib import Path
 
-# Add agents directory to sys.path to enable shared battle_logger import
+# Add agents directory to sys.path to enable shared battle_logger / marketplace_client imports
 agents_dir = Path(__file__).parent.parent
 if str(agents_dir) not in sys.path:
     sys.path.insert(0, str(agents_dir))
 
-import requests
 import agentbeats as ab
 from typing import Optional
 
@@ -24,8 +23,12 @@ from agentbeats.logging import BattleContext
 log_tool_request = battle_logger.log_tool_request
 log_tool_response = battle_logger.log_tool_response
 
-# API configuration
-API_URL = os.getenv("MARKETPLACE_API_URL", "http://localhost:8000")
+# Shared marketplace API client - one connection pool per agent process
+import marketplace_client
+API_URL = marketplace_client.API_URL
+_CLIENT = marketplace_client.client
+get_auth_header = marketplace_client.get_auth_header
+json_loads = marketplace_client.json_loads
 
 # No longer need mock base64 images - we use image IDs from the database
 
@@ -35,31 +38,42 @@ API_URL = os.getenv("MARKETPLACE_API_URL", "http://localhost:8000")
 _seller_counter = 0
 _last_battle_id = None
 
-def _get_seller_id_from_token(auth_token: str) -> Optional[str]:
+# How long an established battle context is trusted before re-polling
+CONTEXT_TTL_SECONDS = 5.0
+_context_last_checked = 0.0
+
+async def _get_seller_id_from_token(auth_token: str) -> Optional[str]:
     """Extract seller ID from auth token by making a test API call."""
     try:
         # Use getSalesStats to identify which seller this is
-        response = requests.get(
-            f"{API_URL}/getSalesStats",
-            headers={"Authorization": f"Bearer {auth_token}"}
+        response = await _CLIENT.get(
+            "/getSalesStats",
+            headers=get_auth_header(auth_token)
         )
         if response.status_code == 200:
-            data = response.json()
+            data = json_loads(response.content)
             return data.get("seller_id")
     except:
         pass
     return None
 
 
-def _get_battle_context_from_db(auth_token: Optional[str] = None):
+async def _get_battle_context_from_db(auth_token: Optional[str] = None):
     """Retrieve battle context from database metadata and update if battle_id changed."""
-    global _seller_counter, _last_battle_id
+    global _seller_counter, _last_battle_id, _context_last_checked
+    
+    # Skip polling while a recently confirmed context exists
+    now = time.monotonic()
+    if (
+        battle_logger.get_battle_context() is not None
+        and now - _context_last_checked < CONTEXT_TTL_SECONDS
+    ):
+        return True
     
     try:
         # Retrieve battle metadata from the API
-        response = requests.get(f"{API_URL}/admin/metadata")
-        if response.status_code == 200:
-            metadata = response.json()
+        status_code, metadata = await marketplace_client.get_battle_metadata()
+        if status_code == 200:
             battle_id = metadata.get("battle_id")
             backend_url = metadata.get("backend_url")
             
@@ -70,12 +84,12 @@ def _get_battle_context_from_db(auth_token: Optional[str] = None):
                     agent_name = f"seller{_seller_counter + 1}"  # Default fallback
                     
                     if auth_token:
-                        seller_id = _get_seller_id_from_token(auth_token)
+                        seller_id = await _get_seller_id_from_token(auth_token)
                         if seller_id:
                             # Retrieve seller names mapping
-                            names_response = requests.get(f"{API_URL}/admin/metadata/seller_names")
+                            names_response = await _CLIENT.get("/admin/metadata/seller_names")
                             if names_response.status_code == 200:
-                                seller_names = names_response.json().get("seller_names", {})
+                                seller_names = json_loads(names_response.content).get("seller_names", {})
                                 agent_name = seller_names.get(seller_id, agent_name)
                     
                     _seller_counter += 1
@@ -88,27 +102,23 @@ def _get_battle_context_from_db(auth_token: Optional[str] = None):
                     _last_battle_id = battle_id
                     print(f"✅ Seller agent '{agent_name}': Battle context initialized from database")
                     print(f"   battle_id={battle_id}, backend_url={backend_url}")
+                _context_last_checked = now
                 return True
             else:
                 print(f"⚠️  Seller agent: Metadata retrieved but missing values - battle_id={battle_id}, backend_url={backend_url}")
         else:
-            print(f"⚠️  Seller agent: Failed to retrieve metadata - Status {response.status_code}")
+            print(f"⚠️  Seller agent: Failed to retrieve metadata - Status {status_code}")
     except Exception as e:
         print(f"⚠️  Seller agent: Exception retrieving battle context: {e}")
     
     return False
 
-# Try to initialize on module load
-_get_battle_context_from_db()
-
-
-def get_auth_header(auth_token: str) -> dict:
-    """Helper to create authorization header"""
-    return {"Authorization": f"Bearer {auth_token}"}
+# Battle context is initialized lazily on the first tool call, since the
+# async client can only be awaited from within the agent's event loop
 
 
 @ab.tool
-def create_product(
+async def create_product(
     auth_token: str,
     product_id: str,
     name: str,
@@ -167,10 +177,10 @@ def create_product(
         ... )
     """
     # Lazy initialization - try to get battle context if not already initialized
-    _get_battle_context_from_db(auth_token)
+    await _get_battle_context_from_db(auth_token)
     
     log_tool_request("create_product", product_id=product_id, name=name, price=price, 
-                     towel_variant=towel_variant, image_count=len(image_ids), auth_token=auth_token)
+                     towel_variant=towel_variant, image_count=len(image_ids))
     
     payload = {
         "name": name,
@@ -181,8 +191,8 @@ def create_product(
         "towel_variant": towel_variant
     }
     
-    response = requests.post(
-        f"{API_URL}/product/{product_id}",
+    response = await _CLIENT.post(
+        f"/product/{product_id}",
         json=payload,
         headers=get_auth_header(auth_token)
     )
@@ -193,7 +203,7 @@ def create_product(
             "success": True,
             "product_id": product_id,
             "message": "Product created successfully",
-            "data": response.json()
+            "data": json_loads(response.content)
         }
     else:
         log_tool_response("create_product", False, f"Error: {response.status_code}")
@@ -206,7 +216,7 @@ def create_product(
 
 
 @ab.tool
-def update_product(
+async def update_product(
     auth_token: str,
     product_id: str,
     name: Optional[str] = None,
@@ -256,6 +266,7 @@ def update_product(
         ...     towel_variant="mid_tier"  # Optional: Change to mid-tier variant
         ... )
     """
+    await _get_battle_context_from_db(auth_token)
     # Build update summary for logging
     updates = []
     if name is not None:
@@ -267,7 +278,7 @@ def update_product(
     if image_ids is not None:
         updates.append(f"images={len(image_ids)}")
     
-    log_tool_request("update_product", product_id=product_id, updates=", ".join(updates), auth_token=auth_token)
+    log_tool_request("update_product", product_id=product_id, updates=", ".join(updates))
     
     payload = {}
     
@@ -284,8 +295,8 @@ def update_product(
     if towel_variant is not None:
         payload["towel_variant"] = towel_variant
     
-    response = requests.patch(
-        f"{API_URL}/product/{product_id}",
+    response = await _CLIENT.patch(
+        f"/product/{product_id}",
         json=payload,
         headers=get_auth_header(auth_token)
     )
@@ -296,7 +307,7 @@ def update_product(
             "success": True,
             "product_id": product_id,
             "message": "Product updated successfully",
-            "data": response.json()
+            "data": json_loads(response.content)
         }
     else:
         log_tool_response("update_product", False, f"Error: {response.status_code}")
@@ -309,7 +320,7 @@ def update_product(
 
 
 @ab.tool
-def get_sales_stats(auth_token: str):
+async def get_sales_stats(auth_token: str):
     """
     Get sales statistics for the seller's products.
     
@@ -322,15 +333,16 @@ def get_sales_stats(auth_token: str):
     Example:
         >>> get_sales_stats(auth_token="abc123")
     """
-    log_tool_request("get_sales_stats", auth_token=auth_token)
+    await _get_battle_context_from_db(auth_token)
+    log_tool_request("get_sales_stats")
     
-    response = requests.get(
-        f"{API_URL}/getSalesStats",
+    response = await _CLIENT.get(
+        "/getSalesStats",
         headers=get_auth_header(auth_token)
     )
     
     if response.status_code == 200:
-        data = response.json()
+        data = json_loads(response.content)
         total_sales = data.get("total_sales", 0)
         total_revenue = data.get("total_revenue_cents", 0) / 100
         log_tool_response("get_sales_stats", True, f"{total_sales} sales, ${total_revenue:.2f} revenue")
@@ -348,7 +360,7 @@ def get_sales_stats(auth_token: str):
 
 
 @ab.tool
-def get_product_details(product_id: str):
+async def get_product_details(product_id: str):
     """
     Get detailed information about a specific product.
     
@@ -361,12 +373,13 @@ def get_product_details(product_id: str):
     Example:
         >>> get_product_details("towel-001")
     """
-    response = requests.get(f"{API_URL}/product/{product_id}")
+    await _get_battle_context_from_db()
+    response = await _CLIENT.get(f"/product/{product_id}")
     
     if response.status_code == 200:
         return {
             "success": True,
-            "data": response.json()
+            "data": json_loads(response.content)
         }
     else:
         return {
@@ -377,7 +390,7 @@ def get_product_details(product_id: str):
 
 
 @ab.tool
-def get_available_images():
+async def get_available_images():
     """
     Get all available images grouped by product_number.
     Returns image descriptions (not base64) organized by category.
@@ -403,12 +416,13 @@ def get_available_images():
             "02": [...]
         }
     """
-    response = requests.get(f"{API_URL}/images")
+    await _get_battle_context_from_db()
+    response = await _CLIENT.get("/images")
     
     if response.status_code == 200:
         return {
             "success": True,
-            "data": response.json()
+            "data": json_loads(response.content)
         }
     else:
         return {
@@ -419,7 +433,7 @@ def get_available_images():
 
 
 @ab.tool
-def get_images_by_product_number(product_number: str):
+async def get_images_by_product_number(product_number: str):
     """
     Get all images for a specific product_number category.
     
@@ -436,12 +450,13 @@ def get_images_by_product_number(product_number: str):
     Example:
         >>> get_images_by_product_number("01")
     """
-    response = requests.get(f"{API_URL}/images/product-number/{product_number}")
+    await _get_battle_context_from_db()
+    response = await _CLIENT.get(f"/images/product-number/{product_number}")
     
     if response.status_code == 200:
         return {
             "success": True,
-            "images": response.json()
+            "images": json_loads(response.content)
         }
     else:
         return {
@@ -452,7 +467,7 @@ def get_images_by_product_number(product_number: str):
 
 
 @ab.tool
-def get_available_product_numbers():
+async def get_available_product_numbers():
     """
     Get list of all available product_numbers (categories) that have images.
     
@@ -463,12 +478,13 @@ def get_available_product_numbers():
         >>> get_available_product_numbers()
         {"success": True, "product_numbers": ["01", "02", "03"]}
     """
-    response = requests.get(f"{API_URL}/images/product-numbers")
+    await _get_battle_context_from_db()
+    response = await _CLIENT.get("/images/product-numbers")
     
     if response.status_code == 200:
         return {
             "success": True,
-            "product_numbers": response.json()
+            "product_numbers": json_loads(response.content)
         }
     else:
         return {
@@ -479,7 +495,7 @@ def get_available_product_numbers():
 
 
 @ab.tool
-def search_products(query: str = ""):
+async def search_products(query: str = ""):
     """
     Search for products in the marketplace.
     
@@ -492,12 +508,13 @@ def search_products(query: str = ""):
     Example:
         >>> search_products("towel")
     """
-    response = requests.get(f"{API_URL}/search?q={query}")
+    await _get_battle_context_from_db()
+    response = await _CLIENT.get("/search", params={"q": query})
     
     if response.status_code == 200:
         return {
             "success": True,
-            "data": response.json()
+            "data": json_loads(response.content)
         }
     else:
         return {
@@ -1,4 +1,6 @@
-from fastapi import APIRouter, Depends, Header, HTTPException
+import hashlib
+
+from fastapi import APIRouter, Depends, Header, HTTPException, Response
 from sqlalchemy.orm import Session
 
 from app.config import settings
@@ -11,6 +13,8 @@ from app.schemas.metadata import (
     DayUpdateRequest,
     RoundResponse,
     RoundUpdateRequest,
+    AdvanceRequest,
+    AdvanceResponse,
 )
 from app.services.phase_manager import get_current_phase, set_current_phase
 from app.services.day_manager import get_current_day, set_current_day
@@ -92,6 +96,33 @@ def update_round(
     new_round = set_current_round(db, round_update.round)
     return RoundResponse(round=new_round)
 
+
+@router.post("/advance", response_model=AdvanceResponse)
+def advance_marketplace(
+    advance: AdvanceRequest,
+    _: None = Depends(ensure_admin_key),
+    db: Session = Depends(get_db),
+) -> AdvanceResponse:
+    """Update round, day and phase in one request.
+
+    Omitted fields keep their current value. All provided fields are committed
+    together, so an invalid value leaves the marketplace state untouched.
+    """
+    if advance.round is not None:
+        set_current_round(db, advance.round, commit=False)
+    if advance.day is not None:
+        set_current_day(db, advance.day, commit=False)
+    if advance.phase is not None:
+        set_current_phase(db, advance.phase, commit=False)
+    db.commit()
+
+    return AdvanceResponse(
+        round=get_current_round(db),
+        day=get_current_day(db),
+        phase=get_current_phase(db),
+    )
+
+
 @router.post("/metadata")
 def store_battle_metadata(
     metadata: dict,
@@ -128,15 +159,37 @@ def store_battle_metadata(
 
 @router.get("/metadata")
 def get_battle_metadata(
+    response: Response,
+    if_none_match: str | None = Header(default=None, alias="If-None-Match"),
     db: Session = Depends(get_db),
-) -> dict:
-    """Retrieve battle context metadata. No auth required so agents can read it."""
+):
+    """Retrieve battle context metadata. No auth required so agents can read it.
+
+    The current round and day are included so agents can tell when cached
+    marketplace data (rankings, prices) may have changed.
+
+    The response carries an ETag; agents polling with a matching If-None-Match
+    header get an empty 304 instead of the full body.
+    """
     battle_id_meta = db.query(Metadata).filter(Metadata.key == "battle_id").first()
     backend_url_meta = db.query(Metadata).filter(Metadata.key == "backend_url").first()
     
+    battle_id = battle_id_meta.value if battle_id_meta else None
+    backend_url = backend_url_meta.value if backend_url_meta else None
+    current_round = get_current_round(db)
+    current_day = get_current_day(db)
+    etag_source = f"{battle_id}|{backend_url}|{current_round}|{current_day}"
+    etag = '"' + hashlib.sha1(etag_source.encode()).hexdigest() + '"'
+
+    if if_none_match == etag:
+        return Response(status_code=304, headers={"ETag": etag})
+
+    response.headers["ETag"] = etag
     return {
-        "battle_id": battle_id_meta.value if battle_id_meta else None,
-        "backend_url": backend_url_meta.value if backend_url_meta else None
+        "battle_id": battle_id,
+        "backend_url": backend_url,
+        "round": current_round,
+        "day": current_day,
     }
 
 
@@ -1,4 +1,5 @@
 import random
+from operator import itemgetter
 from typing import List
 
 from fastapi import APIRouter, Depends
@@ -25,13 +26,10 @@ def initialize_rankings(db: Session = Depends(get_db)):
     if not products:
         return {"message": "No products to rank", "updated_count": 0}
     
-    # Generate random rankings
-    random_rankings = list(range(1, len(products) + 1))
-    random.shuffle(random_rankings)
-    
-    # Assign rankings to products
-    for i, product in enumerate(products):
-        product.ranking = random_rankings[i]
+    # Assign a random permutation of 1..N as rankings
+    random_rankings = random.sample(range(1, len(products) + 1), len(products))
+    for product, ranking in zip(products, random_rankings):
+        product.ranking = ranking
     
     db.commit()
     
@@ -79,7 +77,7 @@ def update_rankings_by_sales(db: Session = Depends(get_db)):
     # Sort by sales count (descending) - most sales first
     sorted_products = sorted(
         products_with_sales, 
-        key=lambda x: x["sales_count"], 
+        key=itemgetter("sales_count"), 
         reverse=True
     )
     
@@ -25,3 +25,15 @@ class RoundResponse(BaseModel):
 
 class RoundUpdateRequest(BaseModel):
     round: int
+
+
+class AdvanceRequest(BaseModel):
+    round: int | None = None
+    day: int | None = None
+    phase: Phase | None = None
+
+
+class AdvanceResponse(BaseModel):
+    round: int
+    day: int
+    phase: Phase
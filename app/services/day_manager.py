@@ -19,7 +19,7 @@ def get_current_day(db: Session) -> int:
         return DEFAULT_DAY
 
 
-def set_current_day(db: Session, day: int) -> int:
+def set_current_day(db: Session, day: int, commit: bool = True) -> int:
     """Persist the provided day value in metadata."""
     if day < 0:
         raise HTTPException(
@@ -34,6 +34,7 @@ def set_current_day(db: Session, day: int) -> int:
     else:
         record.value = str(day)
 
-    db.commit()
-    db.refresh(record)
+    if commit:
+        db.commit()
+        db.refresh(record)
     return day
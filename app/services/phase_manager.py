@@ -36,7 +36,7 @@ def get_current_phase(db: Session) -> Phase:
         return DEFAULT_PHASE
 
 
-def set_current_phase(db: Session, phase: Phase) -> Phase:
+def set_current_phase(db: Session, phase: Phase, commit: bool = True) -> Phase:
     """Persist the given phase as the current marketplace phase."""
     record = db.query(Metadata).filter(Metadata.key == PHASE_KEY).first()
 
@@ -46,8 +46,9 @@ def set_current_phase(db: Session, phase: Phase) -> Phase:
     else:
         record.value = phase.value
 
-    db.commit()
-    db.refresh(record)
+    if commit:
+        db.commit()
+        db.refresh(record)
     return phase
 
 
@@ -19,7 +19,7 @@ def get_current_round(db: Session) -> int:
         return DEFAULT_ROUND
 
 
-def set_current_round(db: Session, round_number: int) -> int:
+def set_current_round(db: Session, round_number: int, commit: bool = True) -> int:
     """Persist the provided round value in metadata."""
     if round_number < 1:
         raise HTTPException(
@@ -34,6 +34,7 @@ def set_current_round(db: Session, round_number: int) -> int:
     else:
         record.value = str(round_number)
 
-    db.commit()
-    db.refresh(record)
+    if commit:
+        db.commit()
+        db.refresh(record)
     return round_number
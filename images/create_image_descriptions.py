@@ -8,22 +8,24 @@ import sys
 import base64
 import hashlib
 import argparse
+import threading
 from pathlib import Path
 from openai import OpenAI
 from sqlalchemy.orm import Session
 
-os.environ["OPENAI_API_KEY"] = os.getenv("OPENAI_API_KEY") or "dummy"
-
-# Add parent directory to path to import app modules
-sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
-
-from app.database import SessionLocal, engine, Base
-from app.models.image import Image
+# Parent directory, which holds the app package
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
 
 # Supported image extensions
 SUPPORTED_EXTENSIONS = {'.jpg', '.jpeg', '.png', '.gif', '.webp', '.bmp'}
 
 
+def _ensure_project_on_path():
+    """Make the app modules importable when running from the images folder."""
+    if PROJECT_ROOT not in sys.path:
+        sys.path.insert(0, PROJECT_ROOT)
+
+
 def encode_image_to_base64(image_path: str) -> str:
     """Encode an image file to base64 string."""
     with open(image_path, 'rb') as image_file:
@@ -100,7 +102,13 @@ def save_description_to_file(image_path: Path, description: str):
     return desc_path
 
 
-def process_images(images_dir: str, db: Session, client: OpenAI, regenerate: bool = False):
+def process_images(
+    images_dir: str,
+    db: Session,
+    client: OpenAI,
+    regenerate: bool = False,
+    stop_event: threading.Event | None = None,
+):
     """Process all images in the directory and subdirectories.
     
     Args:
@@ -108,7 +116,11 @@ def process_images(images_dir: str, db: Session, client: OpenAI, regenerate: boo
         db: Database session
         client: OpenAI client
         regenerate: If True, regenerate descriptions even if .txt files exist
+        stop_event: If set while running, stop before the next image
     """
+    _ensure_project_on_path()
+    from app.models.image import Image
+
     images_path = Path(images_dir)
     
     if not images_path.exists():
@@ -127,6 +139,10 @@ def process_images(images_dir: str, db: Session, client: OpenAI, regenerate: boo
     errors = 0
     
     for image_file in image_files:
+        if stop_event is not None and stop_event.is_set():
+            print("⏹️  Stop requested, not processing remaining images")
+            break
+
         try:
             # Check if image already exists in database
             relative_path = str(image_file.relative_to(images_path))
@@ -202,28 +218,22 @@ def process_images(images_dir: str, db: Session, client: OpenAI, regenerate: boo
     print(f"{'='*60}")
 
 
-def main():
-    """Main function to run the script."""
-    # Parse command line arguments
-    parser = argparse.ArgumentParser(
-        description='Generate descriptions for product images using OpenAI Vision API'
-    )
-    parser.add_argument(
-        '--regenerate',
-        action='store_true',
-        help='Regenerate descriptions even if .txt files already exist'
-    )
-    args = parser.parse_args()
-    
-    # Get OpenAI API key from environment
-    api_key = os.getenv("OPENAI_API_KEY")
-    if not api_key:
-        print("Error: OPENAI_API_KEY environment variable not set")
-        print("Please set it with: export OPENAI_API_KEY='your-api-key'")
-        return
-    
-    # Initialize OpenAI client
-    client = OpenAI(api_key=api_key)
+def reload_all(regenerate: bool = False, stop_event: threading.Event | None = None):
+    """Load every image in the images folder into the database.
+
+    This is what running the script does; the green agent calls it directly
+    at the start of each battle instead of spawning a new interpreter.
+
+    Args:
+        regenerate: If True, clear existing images and regenerate all descriptions
+        stop_event: If set while running, stop before the next image
+    """
+    _ensure_project_on_path()
+    from app.database import SessionLocal, engine, Base
+    from app.models.image import Image
+
+    # Initialize OpenAI client (descriptions are usually read from the .txt files)
+    client = OpenAI(api_key=os.getenv("OPENAI_API_KEY") or "dummy")
     
     # Create tables if they don't exist
     Base.metadata.create_all(bind=engine)
@@ -231,7 +241,7 @@ def main():
     # Get database session
     db = SessionLocal()
     
-    if args.regenerate:
+    if regenerate:
         print("🔄 Running in REGENERATE mode - will recreate all descriptions")
         print("🗑️  Clearing existing images from database...")
         
@@ -243,15 +253,41 @@ def main():
         except Exception as e:
             print(f"   Error clearing database: {e}")
             db.rollback()
+            db.close()
             return
     
     try:
         # Process images from the current directory (script is in images folder)
-        images_dir = os.path.dirname(__file__)
-        process_images(images_dir, db, client, regenerate=args.regenerate)
+        images_dir = os.path.dirname(os.path.abspath(__file__))
+        process_images(images_dir, db, client, regenerate=regenerate, stop_event=stop_event)
     finally:
         db.close()
 
 
+def main():
+    """Main function to run the script."""
+    os.environ["OPENAI_API_KEY"] = os.getenv("OPENAI_API_KEY") or "dummy"
+
+    # Parse command line arguments
+    parser = argparse.ArgumentParser(
+        description='Generate descriptions for product images using OpenAI Vision API'
+    )
+    parser.add_argument(
+        '--regenerate',
+        action='store_true',
+        help='Regenerate descriptions even if .txt files already exist'
+    )
+    args = parser.parse_args()
+    
+    # Get OpenAI API key from environment
+    api_key = os.getenv("OPENAI_API_KEY")
+    if not api_key:
+        print("Error: OPENAI_API_KEY environment variable not set")
+        print("Please set it with: export OPENAI_API_KEY='your-api-key'")
+        return
+    
+    reload_all(regenerate=args.regenerate)
+
+
 if __name__ == "__main__":
     main()
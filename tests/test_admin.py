@@ -45,3 +45,95 @@ class TestAdminRoundEndpoints:
         response = client.post("/admin/round", json={"round": 0})
         assert response.status_code == 400
         assert "positive integer" in response.json()["detail"]
+
+
+class TestAdminAdvanceEndpoint:
+    """Ensure round, day and phase can be updated in a single request."""
+
+    def test_advance_updates_all_fields(self, client):
+        response = client.post(
+            "/admin/advance",
+            json={"round": 2, "day": 4, "phase": "buyer_shopping"},
+        )
+        assert response.status_code == 200
+        assert response.json() == {"round": 2, "day": 4, "phase": "buyer_shopping"}
+
+        assert client.get("/admin/round").json() == {"round": 2}
+        assert client.get("/admin/day").json() == {"day": 4}
+        assert client.get("/admin/phase").json() == {"phase": "buyer_shopping"}
+
+    def test_advance_keeps_omitted_fields(self, client):
+        client.post("/admin/round", json={"round": 3})
+
+        response = client.post("/admin/advance", json={"day": 1})
+        assert response.status_code == 200
+        assert response.json()["round"] == 3
+        assert response.json()["day"] == 1
+
+    def test_advance_rejects_invalid_values_without_partial_update(self, client):
+        response = client.post("/admin/advance", json={"round": 2, "day": -1})
+        assert response.status_code == 400
+        assert "non-negative" in response.json()["detail"]
+
+        assert client.get("/admin/round").json() == {"round": 1}
+        assert client.get("/admin/day").json() == {"day": 0}
+
+
+class TestAdminMetadataEndpoints:
+    """Ensure battle metadata polling supports conditional requests."""
+
+    def test_get_metadata_returns_etag(self, client):
+        client.post(
+            "/admin/metadata",
+            json={"battle_id": "battle-1", "backend_url": "http://backend"},
+        )
+
+        response = client.get("/admin/metadata")
+        assert response.status_code == 200
+        assert response.json() == {
+            "battle_id": "battle-1",
+            "backend_url": "http://backend",
+            "round": 1,
+            "day": 0,
+        }
+        assert response.headers["ETag"]
+
+    def test_get_metadata_not_modified_for_matching_etag(self, client):
+        client.post(
+            "/admin/metadata",
+            json={"battle_id": "battle-1", "backend_url": "http://backend"},
+        )
+        etag = client.get("/admin/metadata").headers["ETag"]
+
+        response = client.get("/admin/metadata", headers={"If-None-Match": etag})
+        assert response.status_code == 304
+        assert response.content == b""
+
+    def test_get_metadata_etag_changes_with_battle(self, client):
+        client.post(
+            "/admin/metadata",
+            json={"battle_id": "battle-1", "backend_url": "http://backend"},
+        )
+        etag = client.get("/admin/metadata").headers["ETag"]
+
+        client.post(
+            "/admin/metadata",
+            json={"battle_id": "battle-2", "backend_url": "http://backend"},
+        )
+        response = client.get("/admin/metadata", headers={"If-None-Match": etag})
+        assert response.status_code == 200
+        assert response.json()["battle_id"] == "battle-2"
+        assert response.headers["ETag"] != etag
+
+    def test_get_metadata_etag_changes_with_day(self, client):
+        client.post(
+            "/admin/metadata",
+            json={"battle_id": "battle-1", "backend_url": "http://backend"},
+        )
+        etag = client.get("/admin/metadata").headers["ETag"]
+
+        client.post("/admin/day", json={"day": 2})
+        response = client.get("/admin/metadata", headers={"If-None-Match": etag})
+        assert response.status_code == 200
+        assert response.json()["day"] == 2
+        assert response.headers["ETag"] != etag